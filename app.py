@@ -1,7 +1,9 @@
 import streamlit as st
 import os
+import logging
 import importlib.util
 import traceback
+import uuid
 from urllib.parse import urlparse
 
 st.set_page_config(
@@ -16,7 +18,6 @@ def check_dependencies():
     packages_to_check = [
         ("youtube_transcript_api", "youtube-transcript-api"),
         ("dotenv", "python-dotenv"),
-        ("bs4", "beautifulsoup4"),
         ("requests", "requests")
     ]
 
@@ -40,13 +41,60 @@ except ImportError:
 
 from dotenv import load_dotenv
 from src.video_info import GetVideo
+from src.negative_cache import TranscriptUnavailable, OUTCOME_MESSAGES, is_hard_failure
+from src.transcript_cache import TranscriptCache
+from src.video_probe import VideoProbe
 from src.model import Model
 from src.prompt import Prompt
 from src.timestamp_formatter import TimestampFormatter
+from src.response_cache import MemoryBackend
+from src.prefetch import PrefetchExecutor, PREFETCH_ENABLED
 
 if not check_dependencies():
     st.stop()
 
+load_dotenv()
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+# Streamlit reruns the whole script on every click; these keep a rerun from redoing the pipeline
+TITLE_CACHE_TTL = int(os.getenv("APP_TITLE_CACHE_TTL", "86400"))
+SEGMENTS_CACHE_TTL = int(os.getenv("APP_SEGMENTS_CACHE_TTL", "3600"))
+RESULT_CACHE_TTL = int(os.getenv("APP_RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("APP_RESULT_CACHE_MAX_ENTRIES", "256"))
+
+
+@st.cache_data(ttl=TITLE_CACHE_TTL, max_entries=1024, show_spinner=False)
+def cached_title(video_id):
+    title = GetVideo.title(f"https://www.youtube.com/watch?v={video_id}")
+    if not title or (isinstance(title, str) and title.startswith("⚠️")):
+        # Exceptions are not cached, so a failed lookup is retried on the next run
+        raise LookupError(title or "No title")
+    return title
+
+
+@st.cache_data(ttl=SEGMENTS_CACHE_TTL, max_entries=128, show_spinner=False)
+def cached_segments(video_id, lang_code):
+    preferred = lang_code if lang_code != "auto" else None
+    segments = GetVideo.segments(f"https://www.youtube.com/watch?v={video_id}", preferred_lang=preferred)
+    if not segments:
+        raise LookupError("No transcript segments")
+    return segments
+
+
+@st.cache_resource
+def result_store():
+    """Finished results keyed by (video_id, mode, language), shared by every session."""
+    return MemoryBackend(RESULT_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource
+def prefetcher():
+    """One background executor per server process, shared by every session."""
+    return PrefetchExecutor()
+
+# "structured" goes first: the Summary and Timestamps jobs read its result
+PREFETCH_MODES = ("structured", "summary", "timestamps", "transcript")
+
 LANGUAGE_OPTIONS = {
     "Auto-Detect": "auto",
     "English": "en",
@@ -534,8 +582,12 @@ class AIVideoSummarizer:
         self.summary = ""
         self.time_stamps = ""
         self.transcript = ""
+        self.transcript_outcome = None
+        # False for one run after "Regenerate": every cache layer is skipped
+        self.use_cache = True
         load_dotenv()
 
+    @st.fragment
     def _render_header(self):
         theme = st.session_state.theme
         toggle_icon = "☀️" if theme == "dark" else "🌙"
@@ -544,7 +596,8 @@ class AIVideoSummarizer:
         with col2:
             if st.button(toggle_icon, key="theme_toggle", help="Toggle dark/light mode"):
                 st.session_state.theme = "light" if theme == "dark" else "dark"
-                st.rerun()
+                # The theme's CSS covers the whole page, so this needs a full run
+                st.rerun(scope="app")
 
         st.markdown("""
         <div class="app-header">
@@ -581,6 +634,7 @@ class AIVideoSummarizer:
         </div>
         """, unsafe_allow_html=True)
 
+    @st.fragment
     def get_youtube_info(self):
         st.markdown('<div class="input-section">', unsafe_allow_html=True)
         st.markdown('<p class="input-label">🔗 Paste YouTube URL</p>', unsafe_allow_html=True)
@@ -604,6 +658,8 @@ class AIVideoSummarizer:
         if self.youtube_url:
             try:
                 self.video_id = GetVideo.Id(self.youtube_url)
+                if self._video_changed():
+                    st.rerun(scope="app")
                 if self.video_id is None:
                     st.error("⚠️ Invalid YouTube URL. Please provide a valid YouTube video link.")
                     st.stop()
@@ -612,9 +668,9 @@ class AIVideoSummarizer:
                 if not parsed_url.scheme:
                     self.youtube_url = f"https://www.youtube.com/watch?v={self.video_id}"
 
-                self.video_title = GetVideo.title(self.youtube_url)
-
-                if not self.video_title or (isinstance(self.video_title, str) and self.video_title.startswith("⚠️")):
+                try:
+                    self.video_title = cached_title(self.video_id)
+                except LookupError:
                     self.video_title = f"YouTube Video ({self.video_id})"
 
                 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
@@ -629,9 +685,24 @@ class AIVideoSummarizer:
                     f'</div></div>',
                     unsafe_allow_html=True
                 )
+                self.prefetch()
             except Exception as e:
                 st.error(f"⚠️ Error loading video: {str(e)}")
                 print(f"Error details: {traceback.format_exc()}")
+        elif self._video_changed():
+            # The URL was cleared: bring the landing page back
+            st.rerun(scope="app")
+
+    def _video_changed(self):
+        """
+        Record the video shown by this section. The URL box only reruns its own
+        fragment, so a different video has to ask for a full run to rebuild the
+        controls and results below it.
+        """
+        if st.session_state.get("active_video_id") == self.video_id:
+            return False
+        st.session_state.active_video_id = self.video_id
+        return True
 
     def _get_language_code(self):
         return LANGUAGE_OPTIONS.get(st.session_state.selected_language, "auto")
@@ -642,41 +713,230 @@ class AIVideoSummarizer:
             return "the same language as the video"
         return lang.split(" (")[0]
 
-    def get_transcript(self):
+    def get_segments(self):
         if not self.youtube_url or not self.video_id:
             return None
 
-        lang_code = self._get_language_code()
-        preferred = lang_code if lang_code != "auto" else None
-
+        # Every mode renders from the same fetched segments, cached per video/language
+        # Only transient failures are worth a second attempt
         for attempt in range(2):
             try:
-                transcript = GetVideo.transcript(self.youtube_url, preferred_lang=preferred)
-                if transcript:
-                    return transcript
+                return cached_segments(self.video_id, self._get_language_code())
+            except TranscriptUnavailable as e:
+                self.transcript_outcome = e.outcome
+                return None
             except:
                 pass
 
         return None
 
+    def _hard_failure_message(self):
+        if is_hard_failure(self.transcript_outcome):
+            return OUTCOME_MESSAGES[self.transcript_outcome]
+        return None
+
+    def get_transcript(self):
+        segments = self.get_segments()
+        return segments.paragraphs() if segments else None
+
     def get_transcript_time(self):
-        if not self.youtube_url or not self.video_id:
+        segments = self.get_segments()
+        return segments.timed() if segments else None
+
+    def get_structured(self):
+        """Summary, chapters and takeaways from one call, shared by the Summary and Timestamps modes."""
+        segments = self.get_segments()
+        if not segments:
             return None
 
-        lang_code = self._get_language_code()
+        cached = self._cached_result("structured") or self._await_prefetch("structured")
+        if cached is not None:
+            return cached
+
+        result = Model.google_gemini_structured(segments, self._get_language_name(), use_cache=self.use_cache)
+        if isinstance(result, dict):
+            result_store().put(self._result_key("structured"), result)
+        return result
+
+    def _result_key(self, mode):
+        return (self.video_id, mode, self._get_language_code())
+
+    def _cached_result(self, mode):
+        if not self.use_cache:
+            return None
+        return result_store().get(self._result_key(mode), RESULT_CACHE_TTL)
+
+    def _store_result(self, mode, text):
+        if text and not (isinstance(text, str) and text.startswith("⚠️")):
+            result_store().put(self._result_key(mode), text)
+
+    def invalidate_results(self):
+        """Forget this video's results, transcript and title; the next run fetches and regenerates them."""
+        # A background job still running would store the old answer again
+        prefetcher().release(self._session_id())
+        for mode in PREFETCH_MODES:
+            result_store().delete(self._result_key(mode))
+        cached_segments.clear(self.video_id, self._get_language_code())
+        cached_title.clear(self.video_id)
+        # Also drops the negative entry, so a video that just got captions is tried again
+        TranscriptCache.invalidate(self.video_id)
+        VideoProbe.invalidate(self.video_id)
+        # Gemini calls skip the response cache lookup but store their fresh answer over the old one
+        self.use_cache = False
+
+    @staticmethod
+    def _session_id():
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
+        return st.session_state.session_id
+
+    def prefetch(self):
+        """
+        Start every mode for the current video and language in the background, so
+        switching modes shows a finished result or joins the running job. Work
+        this session started for another video or language is released.
+        """
+        if not PREFETCH_ENABLED or not self.video_id:
+            return
+        session_id = self._session_id()
+        keys = {mode: self._result_key(mode) for mode in PREFETCH_MODES}
+        executor = prefetcher()
+        store = result_store()
+        executor.release(session_id, keep=set(keys.values()))
+        # Submitted in order, so "structured" is already running when its readers start
+        for mode, key in keys.items():
+            if store.get(key, RESULT_CACHE_TTL) is None:
+                executor.submit(
+                    session_id, key, AIVideoSummarizer._prefetch_job,
+                    store, executor, self.video_id, mode, self._get_language_code(), self._get_language_name(),
+                    store=store,
+                )
+
+    def _await_prefetch(self, mode):
+        job = prefetcher().get(self._result_key(mode)) if self.use_cache else None
+        if job is None:
+            return None
+        if not job.done():
+            with st.spinner("⏳ Almost there, finishing the background job..."):
+                return job.wait()
+        return job.wait()
+
+    @staticmethod
+    def _prefetch_job(job, store, executor, video_id, mode, lang_code, language):
+        """
+        Headless version of one mode, run on the prefetch pool. Only the transcript
+        route is tried; the audio fallback is left to the foreground, which
+        streams it. Returns the result, or None; the executor stores it.
+
+        Pool threads have no script context, so the store and executor are passed
+        in and segments come from GetVideo (its own caches) rather than
+        cached_segments.
+        """
         preferred = lang_code if lang_code != "auto" else None
+        try:
+            segments = GetVideo.segments(f"https://www.youtube.com/watch?v={video_id}", preferred_lang=preferred)
+        except TranscriptUnavailable:
+            return None
+        if not segments:
+            return None
+        job.check()
+
+        if mode == "structured":
+            result = Model.google_gemini_structured(segments, language)
+            return result if isinstance(result, dict) else None
+
+        structured = None
+        if mode in ("summary", "timestamps"):
+            structured_key = (video_id, "structured", lang_code)
+            pending = executor.get(structured_key)
+            structured = pending.wait() if pending else store.get(structured_key, RESULT_CACHE_TTL)
+            job.check()
+
+        if mode == "summary":
+            result = Model.structured_text(structured, mode)
+            if not result:
+                result = Model.google_gemini(segments.paragraphs(), Prompt.prompt1(language=language), segments=segments)
+        elif mode == "timestamps":
+            result = Model.structured_text(structured, mode)
+            if not result:
+                result = Model.google_gemini(
+                    segments.timed(), Prompt.prompt1(ID="timestamp", language=language), segments=segments
+                )
+                result = TimestampFormatter.format(result) if result and not result.startswith("⚠️") else None
+        else:
+            result = format_transcript(segments.paragraphs())
 
-        for attempt in range(2):
-            try:
-                transcript = GetVideo.transcript_time(self.youtube_url, preferred_lang=preferred)
-                if transcript:
-                    return transcript
-            except:
-                pass
+        if not result or result.startswith("⚠️"):
+            return None
+        return result
 
-        return None
+    @staticmethod
+    def _summary_card(text):
+        return f"""
+                <div class="result-card summary-card">
+                    <div class="result-header summary">📝 Video Summary</div>
+                    <div class="result-content">{text}</div>
+                </div>
+                """
+
+    @staticmethod
+    def _timestamp_card(text):
+        return f"""
+                <div class="result-card timestamp-card">
+                    <div class="result-header timestamp">🕰️ Video Timestamps</div>
+                    <div class="result-content" style="white-space: pre-wrap;">{text}</div>
+                </div>
+                """
+
+    @staticmethod
+    def _transcript_card(text):
+        return f"""
+                <div class="result-card transcript-card">
+                    <div class="result-header transcript">📄 Video Transcript</div>
+                    <div class="result-content" style="white-space: pre-wrap;">{text}</div>
+                </div>
+                """
+
+    @staticmethod
+    def _stream_into(placeholder, deltas, render):
+        # Show the answer as it arrives; a leading error is returned without rendering
+        text = ""
+        for delta in deltas:
+            if not text and delta.startswith("⚠️"):
+                return delta
+            text += delta
+            placeholder.markdown(render(text), unsafe_allow_html=True)
+        return text
+
+    def _stream_video(self, placeholder, prompt, render, merge="reduce"):
+        streamed = []
+
+        def on_delta(delta):
+            streamed.append(delta)
+            placeholder.markdown(render("".join(streamed)), unsafe_allow_html=True)
+
+        video_url = f"https://www.youtube.com/watch?v={self.video_id}"
+        result = Model.google_gemini_video(video_url, prompt, on_delta=on_delta, use_cache=self.use_cache, merge=merge)
+        if not streamed and result and not (isinstance(result, str) and result.startswith("⚠️")):
+            # Joined another session's in-flight call: only its leader streams, we get the finished text
+            placeholder.markdown(render(result), unsafe_allow_html=True)
+        return result
+
+    @staticmethod
+    def _copy_button(text, label):
+        if has_clipboard:
+            st_copy_to_clipboard(text)
+        else:
+            if st.button(label):
+                st.code(text)
 
     def generate_summary(self):
+        self.summary = self._cached_result("summary") or self._await_prefetch("summary")
+        if self.summary:
+            st.markdown(self._summary_card(self.summary), unsafe_allow_html=True)
+            self._copy_button(self.summary, "📋 Copy Summary")
+            return
+
         with st.spinner("🤖 AI is crafting a concise summary..."):
             try:
                 language = self._get_language_name()
@@ -685,13 +945,29 @@ class AIVideoSummarizer:
 
                 # Try transcript-based approach first (faster & more complete)
                 self.video_transcript = self.get_transcript()
+                if self._hard_failure_message():
+                    st.error(self._hard_failure_message())
+                    return
+                placeholder = st.empty()
                 if self.video_transcript:
-                    result = Model.google_gemini(self.video_transcript, prompt)
+                    structured = self.get_structured()
+                    if isinstance(structured, dict):
+                        result = Model.structured_text(structured, "summary")
+                    elif Model.is_quota_error(structured):
+                        result = structured
+                if self.video_transcript and not result:
+                    result = self._stream_into(
+                        placeholder,
+                        Model.google_gemini_stream(
+                            self.video_transcript, prompt, segments=self.get_segments(), use_cache=self.use_cache
+                        ),
+                        self._summary_card,
+                    )
 
-                # Fall back to video API if no transcript
-                if not result or (isinstance(result, str) and result.startswith("⚠️")):
-                    video_url = f"https://www.youtube.com/watch?v={self.video_id}"
-                    video_result = Model.google_gemini_video(video_url, prompt)
+                # Fall back to video API if no transcript (a quota error would only repeat there)
+                if not Model.is_quota_error(result) and (not result or (isinstance(result, str) and result.startswith("⚠️"))):
+                    placeholder.empty()
+                    video_result = self._stream_video(placeholder, prompt, self._summary_card)
                     if video_result:
                         # If video result is valid, use it
                         if not (isinstance(video_result, str) and video_result.startswith("⚠️")):
@@ -701,32 +977,31 @@ class AIVideoSummarizer:
                             result = video_result
 
                 if not result:
+                    placeholder.empty()
                     st.error("😔 Could not generate summary. Please check your Gemini API key and try again.")
                     return
 
                 if isinstance(result, str) and result.startswith("⚠️"):
+                    placeholder.empty()
                     st.error(result)
                     return
 
                 self.summary = result
-                st.markdown(f"""
-                <div class="result-card summary-card">
-                    <div class="result-header summary">📝 Video Summary</div>
-                    <div class="result-content">{self.summary}</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-                if has_clipboard:
-                    st_copy_to_clipboard(self.summary)
-                else:
-                    if st.button("📋 Copy Summary"):
-                        st.code(self.summary)
+                self._store_result("summary", self.summary)
+                placeholder.markdown(self._summary_card(self.summary), unsafe_allow_html=True)
+                self._copy_button(self.summary, "📋 Copy Summary")
 
             except Exception as e:
                 st.error(f"⚠️ An unexpected error occurred: {str(e)}")
                 print(f"Error details: {traceback.format_exc()}")
 
     def generate_time_stamps(self):
+        formatted_timestamps = self._cached_result("timestamps") or self._await_prefetch("timestamps")
+        if formatted_timestamps:
+            st.markdown(self._timestamp_card(formatted_timestamps), unsafe_allow_html=True)
+            self._copy_button(formatted_timestamps, "📋 Copy Timestamps")
+            return
+
         with st.spinner("🕒 Generating timestamps..."):
             try:
                 language = self._get_language_name()
@@ -735,13 +1010,34 @@ class AIVideoSummarizer:
 
                 # Try transcript-based approach first (faster & has full content)
                 self.video_transcript_time = self.get_transcript_time()
+                if self._hard_failure_message():
+                    st.error(self._hard_failure_message())
+                    return
+                placeholder = st.empty()
+                render = lambda text: self._timestamp_card(TimestampFormatter.format(text))
+                formatted_timestamps = None
                 if self.video_transcript_time:
-                    result = Model.google_gemini(self.video_transcript_time, timestamp_prompt)
+                    structured = self.get_structured()
+                    if isinstance(structured, dict) and structured["chapters"]:
+                        # Chapters come back as data; no need to re-parse free text
+                        result = structured
+                        formatted_timestamps = Model.structured_text(structured, "timestamps")
+                    elif Model.is_quota_error(structured):
+                        result = structured
+                if self.video_transcript_time and not result:
+                    result = self._stream_into(
+                        placeholder,
+                        Model.google_gemini_stream(
+                            self.video_transcript_time, timestamp_prompt, segments=self.get_segments(),
+                            use_cache=self.use_cache,
+                        ),
+                        render,
+                    )
 
-                # Fall back to video API if no transcript
-                if not result or (isinstance(result, str) and result.startswith("⚠️")):
-                    video_url = f"https://www.youtube.com/watch?v={self.video_id}"
-                    video_result = Model.google_gemini_video(video_url, timestamp_prompt)
+                # Fall back to video API if no transcript (a quota error would only repeat there)
+                if not Model.is_quota_error(result) and (not result or (isinstance(result, str) and result.startswith("⚠️"))):
+                    placeholder.empty()
+                    video_result = self._stream_video(placeholder, timestamp_prompt, render)
                     if video_result:
                         # If video result is valid, use it
                         if not (isinstance(video_result, str) and video_result.startswith("⚠️")):
@@ -751,44 +1047,49 @@ class AIVideoSummarizer:
                             result = video_result
 
                 if not result:
+                    placeholder.empty()
                     st.error("😔 Could not generate timestamps. Please check your Gemini API key and try again.")
                     return
 
                 if isinstance(result, str) and result.startswith("⚠️"):
+                    placeholder.empty()
                     st.error(result)
                     return
 
-                formatted_timestamps = TimestampFormatter.format(result)
-
-                st.markdown(f"""
-                <div class="result-card timestamp-card">
-                    <div class="result-header timestamp">🕰️ Video Timestamps</div>
-                    <div class="result-content" style="white-space: pre-wrap;">{formatted_timestamps}</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-                if has_clipboard:
-                    st_copy_to_clipboard(formatted_timestamps)
-                else:
-                    if st.button("📋 Copy Timestamps"):
-                        st.code(formatted_timestamps)
+                if formatted_timestamps is None:
+                    formatted_timestamps = TimestampFormatter.format(result)
+                self._store_result("timestamps", formatted_timestamps)
+                placeholder.markdown(self._timestamp_card(formatted_timestamps), unsafe_allow_html=True)
+                self._copy_button(formatted_timestamps, "📋 Copy Timestamps")
 
             except Exception as e:
                 st.error(f"⚠️ An unexpected error occurred: {str(e)}")
                 print(f"Error details: {traceback.format_exc()}")
 
     def generate_transcript(self):
+        self.transcript = self._cached_result("transcript") or self._await_prefetch("transcript")
+        if self.transcript:
+            self._show_transcript(self.transcript)
+            return
+
         with st.spinner("📝 Fetching transcript..."):
             try:
                 language = self._get_language_name()
                 self.video_transcript = self.get_transcript()
+                if self._hard_failure_message():
+                    st.error(self._hard_failure_message())
+                    return
 
                 if not self.video_transcript:
-                    video_url = f"https://www.youtube.com/watch?v={self.video_id}"
-                    gemini_transcript = Model.google_gemini_video(
-                        video_url,
-                        f"Provide a complete word-for-word transcript of this video in {language}. Do not add any commentary, headings, or formatting. Just output the spoken words exactly as they appear in the video."
+                    placeholder = st.empty()
+                    gemini_transcript = self._stream_video(
+                        placeholder,
+                        f"Provide a complete word-for-word transcript of this video in {language}. Do not add any commentary, headings, or formatting. Just output the spoken words exactly as they appear in the video.",
+                        self._transcript_card,
+                        merge="concat",
                     )
+                    # The streamed preview is replaced by the editable text area below
+                    placeholder.empty()
                     if gemini_transcript:
                         self.video_transcript = gemini_transcript
 
@@ -797,32 +1098,30 @@ class AIVideoSummarizer:
                     return
 
                 self.transcript = format_transcript(self.video_transcript)
-
-                st.markdown("""
-                <div class="result-card transcript-card">
-                    <div class="result-header transcript">📄 Video Transcript</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-                st.text_area(
-                    "Transcript",
-                    self.transcript,
-                    height=450,
-                    placeholder="Transcript will appear here...",
-                    key="transcript_area",
-                    label_visibility="collapsed"
-                )
-
-                if has_clipboard:
-                    st_copy_to_clipboard(self.transcript)
-                else:
-                    if st.button("📋 Copy Transcript"):
-                        st.code(self.transcript)
+                self._store_result("transcript", self.transcript)
+                self._show_transcript(self.transcript)
 
             except Exception as e:
                 st.error(f"⚠️ An error occurred: {str(e)}")
                 print(f"Error details: {traceback.format_exc()}")
 
+    def _show_transcript(self, transcript):
+        st.markdown("""
+        <div class="result-card transcript-card">
+            <div class="result-header transcript">📄 Video Transcript</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.text_area(
+            "Transcript",
+            transcript,
+            height=450,
+            placeholder="Transcript will appear here...",
+            key="transcript_area",
+            label_visibility="collapsed"
+        )
+        self._copy_button(transcript, "📋 Copy Transcript")
+
     def run(self):
         st.markdown('<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0">', unsafe_allow_html=True)
         inject_css(st.session_state.theme)
@@ -834,31 +1133,49 @@ class AIVideoSummarizer:
 
         if self.youtube_url and self.video_id:
             st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+            self._render_controls()
+
+    @st.fragment
+    def _render_controls(self):
+        # Mode, language and regenerate rerun only this section; the video above stays put
+        self.use_cache = True
+        col_mode, col_lang, col_refresh = st.columns([2.5, 1, 0.6])
+
+        with col_mode:
+            mode = st.radio(
+                "Mode",
+                ["Summary", "Timestamps", "Transcript"],
+                horizontal=True,
+                label_visibility="collapsed"
+            )
 
-            col_mode, col_lang = st.columns([2.5, 1])
-
-            with col_mode:
-                mode = st.radio(
-                    "Mode",
-                    ["Summary", "Timestamps", "Transcript"],
-                    horizontal=True,
-                    label_visibility="collapsed"
-                )
-
-            with col_lang:
-                st.session_state.selected_language = st.selectbox(
-                    "🌐 Language",
-                    list(LANGUAGE_OPTIONS.keys()),
-                    index=list(LANGUAGE_OPTIONS.keys()).index(st.session_state.selected_language),
-                    label_visibility="collapsed"
-                )
+        language = st.session_state.selected_language
+        with col_lang:
+            st.session_state.selected_language = st.selectbox(
+                "🌐 Language",
+                list(LANGUAGE_OPTIONS.keys()),
+                index=list(LANGUAGE_OPTIONS.keys()).index(st.session_state.selected_language),
+                label_visibility="collapsed"
+            )
 
-            if mode == "Summary":
-                self.generate_summary()
-            elif mode == "Timestamps":
-                self.generate_time_stamps()
-            elif mode == "Transcript":
-                self.generate_transcript()
+        with col_refresh:
+            if st.button("🔄", key="regenerate", help="Regenerate (skip cached results)"):
+                self.invalidate_results()
+        if st.session_state.selected_language != language:
+            self.prefetch()
+
+        self._render_results(mode)
+
+    @st.fragment
+    def _render_results(self, mode):
+        # Copy buttons and the transcript box rerun only the result card
+        self.transcript_outcome = None
+        if mode == "Summary":
+            self.generate_summary()
+        elif mode == "Timestamps":
+            self.generate_time_stamps()
+        elif mode == "Transcript":
+            self.generate_transcript()
 
 if __name__ == "__main__":
     app = AIVideoSummarizer()
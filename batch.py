@@ -0,0 +1,376 @@
+"""
+Headless batch mode: summarize lists of videos, playlists and channels
+without the Streamlit UI.
+
+    python batch.py urls.txt -o results.jsonl
+    cat urls.txt | python batch.py --modes summary,timestamps --language Hindi -o results.jsonl
+
+One JSON object per video is appended to the output as soon as it finishes
+(completion order). Re-running with the same output file skips every video
+already recorded as "ok", so an interrupted run resumes where it stopped.
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from src.video_info import GetVideo
+from src.video_probe import VideoProbe
+from src.negative_cache import TranscriptUnavailable, OUTCOME_MESSAGES, is_hard_failure
+from src.model import Model
+from src.prompt import Prompt
+from src.timestamp_formatter import TimestampFormatter
+from src.gemini_client import GeminiClient
+
+MODES = ("summary", "timestamps", "transcript")
+
+_COLLECTION = re.compile(r"youtube\.com/(?:playlist|channel/|c/|user/|@)")
+
+
+def read_urls(paths):
+    """Non-empty, non-comment lines from ``paths`` ("-" or nothing means stdin)."""
+    for path in paths or ["-"]:
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def _flat_entries(info, depth=0):
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        if entry.get("_type") == "playlist" or (entry.get("ie_key") == "YoutubeTab" and depth < 2):
+            # Channel pages list their tabs (videos, shorts, live) as nested playlists
+            if entry.get("entries") is None and entry.get("url"):
+                entry = _extract_flat(entry["url"])
+            yield from _flat_entries(entry, depth + 1)
+        elif entry.get("id"):
+            yield entry
+
+
+def _extract_flat(url):
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(VideoProbe.ytdlp_opts(extract_flat="in_playlist", skip_download=True)) as ydl:
+        return ydl.extract_info(url, download=False) or {}
+
+
+def expand(url):
+    """``(video_id, title)`` pairs for a video, playlist or channel URL."""
+    # A watch link that also names a playlist still means that one video
+    video_id = GetVideo.Id(url)
+    if video_id or not (_COLLECTION.search(url) or "list=" in url):
+        return [(video_id, None)] if video_id else []
+    return [(entry["id"], entry.get("title")) for entry in _flat_entries(_extract_flat(url))]
+
+
+def load_done(path):
+    """Video ids already recorded as "ok" in an earlier run's output."""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut off by a crash; that video simply runs again
+                continue
+            if record.get("status") == "ok":
+                done.add(record.get("video_id"))
+    return done
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest-rank: the smallest value with at least ``fraction`` of the samples at or below it
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class StageTimer:
+    """Thread-safe per-stage latencies for the throughput report."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._timings.setdefault(stage, []).append(seconds)
+
+    def report(self):
+        with self._lock:
+            return {
+                stage: {
+                    "count": len(values),
+                    "p50": percentile(values, 0.5),
+                    "p95": percentile(values, 0.95),
+                }
+                for stage, values in self._timings.items()
+            }
+
+
+class BatchRunner:
+    """
+    Fetches transcripts on one pool (YouTube-bound) and generates on another
+    (Gemini-bound), so a slow side never idles the other. At most four
+    videos per Gemini worker are held in memory between the two stages.
+    """
+
+    def __init__(self, args, output):
+        self.args = args
+        self.output = output
+        self.modes = args.modes
+        self.timer = StageTimer()
+        self.youtube_pool = ThreadPoolExecutor(max_workers=args.youtube_workers, thread_name_prefix="youtube")
+        self.gemini_pool = ThreadPoolExecutor(max_workers=args.gemini_workers, thread_name_prefix="gemini")
+        self._slots = threading.BoundedSemaphore(args.gemini_workers * 4)
+        self._write_lock = threading.Lock()
+        self._pending = threading.Semaphore(0)
+        self._submitted = []
+        self._written = set()
+        self.counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def _timed(self, stage, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timer.record(stage, time.perf_counter() - started)
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._write_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+            self.counts[record["status"]] += 1
+            self._written.add(record["video_id"])
+
+    def submit(self, video_id, title):
+        self._slots.acquire()
+        self._submitted.append(video_id)
+        self.youtube_pool.submit(self._fetch, video_id, title, time.perf_counter())
+
+    def _fetch(self, video_id, title, started):
+        segments, outcome = None, None
+        try:
+            segments = self._timed("fetch", GetVideo.segments, self._url(video_id), self.args.lang)
+        except TranscriptUnavailable as e:
+            outcome = e.outcome
+        except Exception as e:
+            print(f"Transcript fetch failed for {video_id}: {str(e)}", file=sys.stderr)
+        self.gemini_pool.submit(self._generate, video_id, title, segments, outcome, started)
+
+    @staticmethod
+    def _url(video_id):
+        return f"https://www.youtube.com/watch?v={video_id}"
+
+    def _generate(self, video_id, title, segments, outcome, started):
+        record = {"video_id": video_id, "url": self._url(video_id)}
+        if title:
+            record["title"] = title
+        try:
+            record.update(self._outputs(video_id, segments, outcome))
+        except Exception as e:
+            record["errors"] = {"pipeline": str(e)}
+        finally:
+            self._slots.release()
+
+        record["status"] = "failed" if record.get("errors") or not any(m in record for m in self.modes) else "ok"
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        self.timer.record("total", record["seconds"])
+        self._write(record)
+        self._pending.release()
+
+    def _outputs(self, video_id, segments, outcome):
+        language = self.args.language
+        result = {"errors": {}}
+        if segments:
+            result["transcript_source"] = segments.source
+            result["transcript_language"] = segments.language
+
+        if is_hard_failure(outcome):
+            result["errors"]["transcript"] = OUTCOME_MESSAGES[outcome]
+            return result
+
+        structured = None
+        if segments and ("summary" in self.modes or "timestamps" in self.modes):
+            structured = self._timed("structured", Model.google_gemini_structured, segments, language)
+
+        for mode in self.modes:
+            text = self._timed(mode, self._mode_output, mode, video_id, segments, structured)
+            if text and not text.startswith("⚠️"):
+                result[mode] = text
+            else:
+                result["errors"][mode] = text or f"Could not generate {mode}."
+        if not result["errors"]:
+            del result["errors"]
+        return result
+
+    def _mode_output(self, mode, video_id, segments, structured):
+        language = self.args.language
+        if mode == "transcript":
+            if segments:
+                return segments.paragraphs()
+            prompt = (
+                f"Provide a complete word-for-word transcript of this video in {language}. Do not add any "
+                "commentary, headings, or formatting. Just output the spoken words exactly as they appear in the video."
+            )
+            return self._video(video_id, prompt, merge="concat")
+
+        # Same rendering of the one-call summary/chapters result as the app
+        text = Model.structured_text(structured, mode)
+        if text:
+            return text
+
+        prompt = Prompt.prompt1(ID="timestamp" if mode == "timestamps" else "summary", language=language)
+
+        text = None
+        if segments:
+            transcript = segments.timed() if mode == "timestamps" else segments.paragraphs()
+            text = Model.google_gemini(transcript, prompt, segments=segments)
+        if (not text or text.startswith("⚠️")) and not Model.is_quota_error(text):
+            text = self._video(video_id, prompt) or text
+        if mode == "timestamps" and text and not text.startswith("⚠️"):
+            text = TimestampFormatter.format(text)
+        return text
+
+    def _video(self, video_id, prompt, merge="reduce"):
+        if not self.args.audio_fallback:
+            return None
+        return self._timed(
+            "audio_fallback", lambda: Model.google_gemini_video(self._url(video_id), prompt, merge=merge)
+        )
+
+    def run(self, urls, done):
+        started = time.perf_counter()
+        submitted = 0
+        seen = set()
+        try:
+            for url in urls:
+                try:
+                    videos = self._timed("expand", expand, url)
+                except Exception as e:
+                    print(f"Could not expand {url}: {str(e)}", file=sys.stderr)
+                    continue
+                for video_id, title in videos:
+                    if video_id in seen:
+                        continue
+                    seen.add(video_id)
+                    if video_id in done:
+                        self.counts["skipped"] += 1
+                        continue
+                    self.submit(video_id, title)
+                    submitted += 1
+            for _ in range(submitted):
+                self._pending.acquire()
+        except KeyboardInterrupt:
+            print(
+                "Interrupted; finishing the videos already being fetched or generated (Ctrl+C again to quit now).",
+                file=sys.stderr,
+            )
+            # Videos not yet fetched are dropped; every fetch that started goes on to generation and is written
+            try:
+                self.youtube_pool.shutdown(cancel_futures=True)
+                self.gemini_pool.shutdown()
+            except KeyboardInterrupt:
+                # Worker threads cannot be interrupted and would be joined at exit; leave without them
+                self._report_abandoned()
+                os._exit(130)
+            self._report_abandoned()
+        else:
+            self.youtube_pool.shutdown()
+            self.gemini_pool.shutdown()
+        return time.perf_counter() - started
+
+    def _report_abandoned(self):
+        with self._write_lock:
+            self.output.flush()
+            abandoned = [video_id for video_id in self._submitted if video_id not in self._written]
+        if abandoned:
+            print(f"Not processed (rerun to resume): {', '.join(abandoned)}", file=sys.stderr)
+
+    def report(self, elapsed):
+        processed = self.counts["ok"] + self.counts["failed"]
+        lines = [
+            f"Processed {processed} videos ({self.counts['ok']} ok, {self.counts['failed']} failed, "
+            f"{self.counts['skipped']} skipped) in {elapsed:.1f}s: "
+            f"{processed / elapsed * 60 if elapsed else 0:.1f} videos/min",
+            f"{'stage':<16}{'count':>7}{'p50 (s)':>10}{'p95 (s)':>10}",
+        ]
+        for stage, row in self.timer.report().items():
+            lines.append(f"{stage:<16}{row['count']:>7}{row['p50']:>10.2f}{row['p95']:>10.2f}")
+        gemini = GeminiClient.stats()
+        lines.append(
+            f"Gemini: {gemini['requests']} requests, {gemini['throttled']} throttled, "
+            f"{gemini['queued_seconds']:.1f}s queued for quota"
+        )
+        return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize YouTube videos, playlists and channels in bulk.")
+    parser.add_argument("inputs", nargs="*", help='files with one URL per line ("-" or nothing reads stdin)')
+    parser.add_argument("-o", "--output", default="-", help="JSONL file to append results to (default: stdout)")
+    parser.add_argument(
+        "--modes", default="summary",
+        type=lambda value: [m.strip() for m in value.split(",") if m.strip()],
+        help="comma-separated outputs: summary, timestamps, transcript (default: summary)",
+    )
+    parser.add_argument(
+        "--language", default="the same language as the video",
+        help="output language, e.g. English or Hindi (default: the video's language)",
+    )
+    parser.add_argument("--lang", default=None, help="preferred caption track code, e.g. en")
+    parser.add_argument("--youtube-workers", type=int, default=8, help="concurrent transcript fetches")
+    parser.add_argument("--gemini-workers", type=int, default=4, help="concurrent videos in the Gemini stage")
+    parser.add_argument("--no-audio-fallback", dest="audio_fallback", action="store_false",
+                        help="skip videos without captions instead of transcribing their audio")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="process every video even if the output already has it")
+    args = parser.parse_args(argv)
+
+    unknown = [m for m in args.modes if m not in MODES]
+    if unknown or not args.modes:
+        parser.error(f"unknown mode(s): {', '.join(unknown) or '(none)'}; choose from {', '.join(MODES)}")
+    if args.youtube_workers < 1 or args.gemini_workers < 1:
+        parser.error("worker counts must be at least 1")
+    return args
+
+
+def main(argv=None):
+    load_dotenv()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    if not os.getenv("GOOGLE_GEMINI_API_KEY"):
+        print("⚠️ GOOGLE_GEMINI_API_KEY is not set (see .env.example).", file=sys.stderr)
+        return 2
+
+    done = load_done(args.output) if args.resume and args.output != "-" else set()
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    runner = BatchRunner(args, output)
+    try:
+        elapsed = runner.run(read_urls(args.inputs), done)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(runner.report(elapsed), file=sys.stderr)
+    return 0 if runner.counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
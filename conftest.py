@@ -0,0 +1 @@
+# Lets plain `pytest` import the src package from the repository root
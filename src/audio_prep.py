@@ -0,0 +1,212 @@
+import os
+import re
+import time
+import shutil
+import subprocess
+from functools import lru_cache
+from src.http_client import HttpClient
+from src.video_probe import VideoProbe
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+# Speech stays intelligible for Gemini well below music bitrates
+AUDIO_BITRATE = os.getenv("AUDIO_BITRATE", "24k")
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+# Source formats below this bitrate (kbps) are too lossy to transcribe reliably
+AUDIO_MIN_ABR = float(os.getenv("AUDIO_MIN_ABR", "32"))
+# Ranged requests keep googlevideo from throttling one long download
+AUDIO_CHUNK_BYTES = int(os.getenv("AUDIO_CHUNK_BYTES", str(10 * 1024 * 1024)))
+
+# Long audio is cut into overlapping windows that are processed concurrently
+AUDIO_SEGMENT_SECONDS = float(os.getenv("AUDIO_SEGMENT_SECONDS", "1200"))
+AUDIO_SEGMENT_OVERLAP = float(os.getenv("AUDIO_SEGMENT_OVERLAP", "10"))
+AUDIO_SEGMENT_MIN_DURATION = float(os.getenv("AUDIO_SEGMENT_MIN_DURATION", "2400"))
+
+_CONTENT_RANGE = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_available():
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def _estimated_size(fmt, duration):
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return size
+    if fmt.get("abr") and duration:
+        return fmt["abr"] * 125 * duration
+    return float("inf")
+
+
+def pick_audio_format(info):
+    """Smallest audio-only format that is still good enough for speech, or None."""
+    duration = info.get("duration") or 0
+    audio = [
+        f for f in info.get("formats") or []
+        if f.get("vcodec") == "none" and f.get("acodec") not in (None, "none")
+    ]
+    if not audio:
+        return None
+
+    adequate = [f for f in audio if not f.get("abr") or f["abr"] >= AUDIO_MIN_ABR] or audio
+    # Opus holds up best at low bitrates, so it wins ties
+    return min(adequate, key=lambda f: (_estimated_size(f, duration), f.get("acodec") != "opus"))
+
+
+def _ffmpeg_command(source, output_path):
+    command = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error"]
+    if source != "pipe:0":
+        command.append("-nostdin")
+    return command + [
+        "-i", source, "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE),
+        "-c:a", "libopus", "-b:a", AUDIO_BITRATE, "-application", "voip",
+        "-y", output_path,
+    ]
+
+
+def _run_ffmpeg(command, log_path, feed=None):
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+        )
+        try:
+            if feed:
+                try:
+                    feed(process.stdin)
+                finally:
+                    process.stdin.close()
+            process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+
+    if process.returncode != 0:
+        with open(log_path, "rb") as log:
+            raise RuntimeError(f"ffmpeg failed: {log.read()[-500:].decode('utf-8', 'replace').strip()}")
+
+
+def _stream_format(fmt, headers, pipe):
+    """Download ``fmt`` in ranged chunks and write it to ``pipe`` as it arrives."""
+    start = 0
+    total = fmt.get("filesize")
+    while total is None or start < total:
+        end = start + AUDIO_CHUNK_BYTES - 1
+        response = HttpClient.get(
+            fmt["url"], headers=dict(headers, Range=f"bytes={start}-{end}"), stream=True, timeout=30
+        )
+        try:
+            if response.status_code == 416:
+                # Asked past the end of a file of unknown length
+                break
+            if response.status_code not in (200, 206):
+                raise RuntimeError(f"Audio download failed (HTTP {response.status_code})")
+            match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if match:
+                total = int(match.group(1))
+
+            received = 0
+            for block in response.iter_content(64 * 1024):
+                pipe.write(block)
+                received += len(block)
+        finally:
+            response.close()
+
+        # A server that ignores Range sends everything at once
+        if response.status_code == 200 or received == 0:
+            break
+        start += received
+
+
+def _download(info, fmt, directory):
+    import yt_dlp
+
+    ydl_opts = VideoProbe.ytdlp_opts(
+        format=fmt["format_id"] if fmt else "bestaudio/best",
+        outtmpl=f"{directory}/%(id)s.%(ext)s",
+    )
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.process_ie_result(info, download=True)
+        return ydl.prepare_filename(info)
+
+
+def prepare_audio(video_id, directory):
+    """
+    Produce the audio file to upload for ``video_id`` inside ``directory``.
+    Returns ``(path, mime_type)``; ``mime_type`` is None when Gemini should infer it.
+
+    With ffmpeg available the smallest adequate audio-only format is streamed
+    straight into ffmpeg and transcoded to mono low-bitrate Opus while it
+    downloads. Formats that cannot be fetched directly are downloaded with
+    yt-dlp first; without ffmpeg the downloaded file is used as is.
+    """
+    info = VideoProbe.ytdlp_info(video_id)
+    fmt = pick_audio_format(info)
+    output_path = os.path.join(directory, f"{video_id}.speech.ogg")
+    log_path = os.path.join(directory, "ffmpeg.log")
+    started = time.perf_counter()
+
+    if ffmpeg_available() and fmt and fmt.get("url") and fmt.get("protocol") in ("https", "http"):
+        headers = fmt.get("http_headers") or info.get("http_headers") or {}
+        try:
+            _run_ffmpeg(
+                _ffmpeg_command("pipe:0", output_path), log_path,
+                feed=lambda pipe: _stream_format(fmt, headers, pipe),
+            )
+            VideoProbe.record_timing("audio_stream_transcode", time.perf_counter() - started)
+            return output_path, "audio/ogg"
+        except (OSError, RuntimeError) as e:
+            # A broken pipe or an expired URL: fall back to yt-dlp's own downloader
+            print(f"Streaming transcode failed for {video_id}: {str(e)}")
+            started = time.perf_counter()
+
+    downloaded = _download(info, fmt, directory)
+    VideoProbe.record_timing("audio_download", time.perf_counter() - started)
+    if not downloaded or not os.path.exists(downloaded) or not ffmpeg_available():
+        return downloaded, None
+
+    started = time.perf_counter()
+    try:
+        _run_ffmpeg(_ffmpeg_command(downloaded, output_path), log_path)
+    except (OSError, RuntimeError) as e:
+        print(f"Transcode failed for {video_id}, uploading original audio: {str(e)}")
+        return downloaded, None
+    VideoProbe.record_timing("audio_transcode", time.perf_counter() - started)
+    return output_path, "audio/ogg"
+
+
+def segment_windows(duration):
+    """
+    ``(start, length)`` windows covering ``duration`` seconds, or None when the audio
+    is short enough to send whole. Every window after the first starts
+    AUDIO_SEGMENT_OVERLAP seconds early so nothing said across a cut is lost.
+    """
+    if not duration or duration < AUDIO_SEGMENT_MIN_DURATION or not ffmpeg_available():
+        return None
+
+    windows = []
+    start = 0.0
+    while start < duration:
+        begin = max(0.0, start - AUDIO_SEGMENT_OVERLAP)
+        end = min(duration, start + AUDIO_SEGMENT_SECONDS)
+        windows.append((begin, end - begin))
+        start = end
+    return windows
+
+
+def cut_audio(path, directory, start, length):
+    """Copy ``length`` seconds from ``start`` out of ``path`` without re-encoding."""
+    ext = os.path.splitext(path)[1] or ".ogg"
+    output_path = os.path.join(directory, f"segment-{int(start)}-{int(length)}{ext}")
+    _run_ffmpeg(
+        [
+            FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin",
+            "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", path,
+            "-vn", "-c", "copy", "-y", output_path,
+        ],
+        f"{output_path}.log",
+    )
+    return output_path
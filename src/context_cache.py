@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from src.http_client import HttpClient
+from src.gemini_client import GeminiClient, GEMINI_API_BASE
+from src.response_cache import request_key
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1").lower() in ("1", "true", "yes")
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+# Explicit caches have a minimum size and an hourly storage cost; short transcripts are sent inline
+GEMINI_CONTEXT_CACHE_MIN_CHARS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_CHARS", "16000"))
+GEMINI_CONTEXT_CACHE_MAX_HANDLES = int(os.getenv("GEMINI_CONTEXT_CACHE_MAX_HANDLES", "32"))
+
+# Extend a handle's TTL once less than this fraction of it is left
+REFRESH_FRACTION = 0.5
+
+
+class ContextCache:
+    """
+    Registry of Gemini ``cachedContents`` handles. A long transcript is uploaded
+    once per model and referenced by name from every later prompt, so the
+    second and third mode only pay for the prompt itself.
+
+    Handles are tracked with their expiry: a handle that is about to expire is
+    extended (PATCH ttl) when it is used, an expired one is dropped and
+    recreated, and beyond GEMINI_CONTEXT_CACHE_MAX_HANDLES the least recently
+    used handle is deleted on the server. Any failure falls back to sending the
+    transcript inline.
+    """
+
+    _lock = threading.Lock()
+    _handles = OrderedDict()
+    _creating = {}
+    _stats = {"created": 0, "reused": 0, "refreshed": 0, "evicted": 0, "expired": 0, "failed": 0}
+
+    @staticmethod
+    def applies(text):
+        return GEMINI_CONTEXT_CACHE and len(text or "") >= GEMINI_CONTEXT_CACHE_MIN_CHARS
+
+    @staticmethod
+    def contents(text):
+        return [{"role": "user", "parts": [{"text": f"Video Transcript: {text}"}]}]
+
+    @staticmethod
+    def _count(field, amount=1):
+        with ContextCache._lock:
+            ContextCache._stats[field] += amount
+
+    @staticmethod
+    def _url(path, api_key, **params):
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return f"{GEMINI_API_BASE}/{path}?key={api_key}" + (f"&{query}" if query else "")
+
+    @staticmethod
+    def _create(model, text, api_key, display_name=None):
+        body = {
+            "model": f"models/{model}",
+            "contents": ContextCache.contents(text),
+            "ttl": f"{GEMINI_CONTEXT_CACHE_TTL}s",
+        }
+        if display_name:
+            body["displayName"] = display_name[:128]
+
+        response = GeminiClient.post(
+            ContextCache._url("cachedContents", api_key),
+            json.dumps(body),
+            GeminiClient.estimate_tokens(text),
+            headers={"Content-Type": "application/json"},
+            timeout=60,
+        )
+        if response.status_code != 200:
+            print(f"Context cache create failed (HTTP {response.status_code}): {response.text[:200]}")
+            return None
+        name = response.json().get("name")
+        if not name:
+            return None
+        return {"name": name, "expires": time.time() + GEMINI_CONTEXT_CACHE_TTL, "api_key": api_key}
+
+    @staticmethod
+    def _refresh(handle):
+        response = HttpClient.request(
+            "PATCH",
+            ContextCache._url(handle["name"], handle["api_key"], updateMask="ttl"),
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"ttl": f"{GEMINI_CONTEXT_CACHE_TTL}s"}),
+            timeout=15,
+        )
+        if response.status_code != 200:
+            return False
+        handle["expires"] = time.time() + GEMINI_CONTEXT_CACHE_TTL
+        return True
+
+    @staticmethod
+    def _delete(handle):
+        try:
+            HttpClient.request("DELETE", ContextCache._url(handle["name"], handle["api_key"]), timeout=15)
+        except Exception as e:
+            print(f"Context cache delete failed for {handle['name']}: {str(e)}")
+
+    @staticmethod
+    def _evict():
+        now = time.time()
+        evicted = []
+        with ContextCache._lock:
+            for key in [k for k, h in ContextCache._handles.items() if h["expires"] <= now]:
+                # The server drops expired caches itself
+                del ContextCache._handles[key]
+                ContextCache._stats["expired"] += 1
+            while len(ContextCache._handles) > GEMINI_CONTEXT_CACHE_MAX_HANDLES:
+                _, handle = ContextCache._handles.popitem(last=False)
+                evicted.append(handle)
+                ContextCache._stats["evicted"] += 1
+        for handle in evicted:
+            ContextCache._delete(handle)
+
+    @staticmethod
+    def handle(model, text, api_key, display_name=None):
+        """Return the ``cachedContents/...`` name holding ``text`` for ``model``, creating it if needed, or None."""
+        if not ContextCache.applies(text):
+            return None
+
+        key = request_key("cachedContents", model, text)
+        while True:
+            with ContextCache._lock:
+                handle = ContextCache._handles.get(key)
+                if handle is not None and handle["expires"] > time.time():
+                    ContextCache._handles.move_to_end(key)
+                    ContextCache._stats["reused"] += 1
+                    break
+                pending = ContextCache._creating.get(key)
+                if pending is None:
+                    # This caller creates the cache; concurrent callers for the same text wait for it
+                    ContextCache._handles.pop(key, None)
+                    pending = ContextCache._creating[key] = threading.Event()
+                    handle = None
+                    break
+            pending.wait()
+
+        if handle is None:
+            try:
+                handle = ContextCache._create(model, text, api_key, display_name)
+            except Exception as e:
+                print(f"Context cache create failed: {str(e)}")
+                handle = None
+            with ContextCache._lock:
+                if handle is not None:
+                    ContextCache._handles[key] = handle
+                    ContextCache._stats["created"] += 1
+                else:
+                    ContextCache._stats["failed"] += 1
+                ContextCache._creating.pop(key).set()
+            ContextCache._evict()
+            return handle["name"] if handle else None
+
+        if handle["expires"] - time.time() < GEMINI_CONTEXT_CACHE_TTL * REFRESH_FRACTION:
+            try:
+                if ContextCache._refresh(handle):
+                    ContextCache._count("refreshed")
+            except Exception as e:
+                print(f"Context cache refresh failed for {handle['name']}: {str(e)}")
+        return handle["name"]
+
+    @staticmethod
+    def invalidate(name):
+        """Forget a handle the server no longer knows (expired early or deleted elsewhere)."""
+        with ContextCache._lock:
+            for key in [k for k, h in ContextCache._handles.items() if h["name"] == name]:
+                del ContextCache._handles[key]
+                ContextCache._stats["expired"] += 1
+
+    @staticmethod
+    def clear():
+        with ContextCache._lock:
+            handles = list(ContextCache._handles.values())
+            ContextCache._handles.clear()
+        for handle in handles:
+            ContextCache._delete(handle)
+
+    @staticmethod
+    def stats():
+        with ContextCache._lock:
+            stats = dict(ContextCache._stats)
+            stats["handles"] = len(ContextCache._handles)
+        return stats
@@ -0,0 +1,227 @@
+import os
+import re
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from src.http_client import HttpClient
+from src.token_budget import TokenBudget
+
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_CAP = float(os.getenv("GEMINI_BACKOFF_CAP", "30"))
+# How long a caller may wait in the queue for quota before giving up
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "120"))
+
+RETRYABLE_STATUS = (429, 500, 503)
+
+QUOTA_ERROR_PREFIX = "⚠️ Gemini quota exceeded"
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class TokenBucket:
+    """Blocking token bucket; waiting callers are queued on a condition variable."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1, timeout=None):
+        # A single request larger than the bucket can never fit; let it through at full bucket
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait = (amount - self._tokens) / self.rate if self.rate > 0 else 1.0
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def drain(self, seconds):
+        # The server told us to back off: the next single token becomes available in ``seconds``
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+            self._cond.notify_all()
+
+    def available(self):
+        with self._cond:
+            self._refill()
+            return self._tokens
+
+
+def _retry_after(response):
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # Gemini puts the delay in google.rpc.RetryInfo inside the error body
+    try:
+        body = response.json()
+        if isinstance(body, list):
+            body = body[0]
+        for detail in body.get("error", {}).get("details", []):
+            delay = detail.get("retryDelay")
+            if delay:
+                match = re.match(r"([\d.]+)s", delay)
+                if match:
+                    return float(match.group(1))
+    except Exception:
+        pass
+    return None
+
+
+def _sdk_retry_after(error):
+    """Server retry hint carried by a google-api-core exception (RetryInfo), in seconds, or None."""
+    hints = [getattr(error, "retry_delay", None)]
+    hints += [getattr(detail, "retry_delay", None) for detail in getattr(error, "details", None) or []]
+    for delay in hints:
+        if delay is None:
+            continue
+        if hasattr(delay, "total_seconds"):
+            return max(0.0, delay.total_seconds())
+        if hasattr(delay, "seconds"):
+            # protobuf Duration
+            return max(0.0, delay.seconds + getattr(delay, "nanos", 0) / 1e9)
+        try:
+            return max(0.0, float(delay))
+        except (TypeError, ValueError):
+            continue
+
+    # Older clients only put it in the message text
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)|retry in ([\d.]+)\s*s", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+
+def backoff_delay(attempt):
+    # Full jitter keeps a burst of throttled callers from retrying in lockstep
+    return random.uniform(0, min(GEMINI_BACKOFF_CAP, GEMINI_BACKOFF_BASE * (2 ** attempt)))
+
+
+class GeminiClient:
+    """
+    Process-wide gate in front of the Gemini API: requests-per-minute and
+    tokens-per-minute buckets queue callers instead of failing them, and 429/5xx
+    answers are retried with jittered exponential backoff that honours
+    Retry-After. When retries run out, QuotaExceeded is raised so callers can
+    tell a quota problem from a content problem.
+    """
+
+    requests_bucket = TokenBucket(GEMINI_RPM)
+    tokens_bucket = TokenBucket(GEMINI_TPM)
+
+    _lock = threading.Lock()
+    _stats = {"requests": 0, "throttled": 0, "retries": 0, "quota_exceeded": 0, "queued_seconds": 0.0}
+
+    @staticmethod
+    def _count(field, amount=1):
+        with GeminiClient._lock:
+            GeminiClient._stats[field] += amount
+
+    @staticmethod
+    def stats():
+        with GeminiClient._lock:
+            return dict(GeminiClient._stats)
+
+    @staticmethod
+    def estimate_tokens(text):
+        return max(1, TokenBudget.estimate(text))
+
+    @staticmethod
+    def acquire(tokens):
+        started = time.monotonic()
+        if not GeminiClient.requests_bucket.acquire(1, GEMINI_QUEUE_TIMEOUT):
+            raise QuotaExceeded("timed out waiting for a request slot")
+        remaining = max(0.0, GEMINI_QUEUE_TIMEOUT - (time.monotonic() - started))
+        if not GeminiClient.tokens_bucket.acquire(tokens, remaining):
+            raise QuotaExceeded("timed out waiting for token quota")
+        GeminiClient._count("queued_seconds", time.monotonic() - started)
+
+    @staticmethod
+    def back_off(seconds):
+        GeminiClient.requests_bucket.drain(seconds)
+
+    @staticmethod
+    def post(url, data, tokens, **kwargs):
+        """POST ``data`` (already JSON-encoded) and return the response, retrying throttled calls."""
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            GeminiClient.acquire(tokens)
+            GeminiClient._count("requests")
+            response = HttpClient.post(url, data=data, **kwargs)
+            if response.status_code not in RETRYABLE_STATUS:
+                return response
+
+            GeminiClient._count("throttled")
+            if attempt == GEMINI_MAX_RETRIES:
+                break
+
+            delay = _retry_after(response)
+            response.close()
+            GeminiClient._count("retries")
+            if delay is not None and response.status_code == 429:
+                # Hold every caller, not just this one; acquire() does the waiting
+                GeminiClient.back_off(delay)
+            else:
+                time.sleep(delay if delay is not None else backoff_delay(attempt))
+
+        if response.status_code == 429:
+            # Hand the pooled connection back before giving up on it
+            response.close()
+            GeminiClient._count("quota_exceeded")
+            raise QuotaExceeded(f"HTTP 429 after {GEMINI_MAX_RETRIES} retries")
+        return response
+
+    @staticmethod
+    def call_sdk(fn, tokens):
+        """Run a google-generativeai call under the same quota and retry policy."""
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            GeminiClient.acquire(tokens)
+            GeminiClient._count("requests")
+            try:
+                return fn()
+            except Exception as e:
+                if type(e).__name__ not in ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable"):
+                    raise
+                GeminiClient._count("throttled")
+                if attempt == GEMINI_MAX_RETRIES:
+                    if type(e).__name__ == "ServiceUnavailable":
+                        raise
+                    GeminiClient._count("quota_exceeded")
+                    raise QuotaExceeded(str(e)) from e
+                GeminiClient._count("retries")
+                delay = _sdk_retry_after(e)
+                if delay is not None and type(e).__name__ != "ServiceUnavailable":
+                    # Same as post(): a quota hint holds every caller, acquire() does the waiting
+                    GeminiClient.back_off(delay)
+                else:
+                    time.sleep(delay if delay is not None else backoff_delay(attempt))
@@ -0,0 +1,150 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "15"))
+DEFAULT_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Per-host retry policy. Hosts not listed here use the "default" entry.
+HOST_POLICIES = {
+    "default": {"retries": 1, "backoff": 0.3, "status_forcelist": (502, 503, 504)},
+    "www.youtube.com": {"retries": 2, "backoff": 0.3, "status_forcelist": (500, 502, 503, 504)},
+    "generativelanguage.googleapis.com": {"retries": 1, "backoff": 0.5, "status_forcelist": ()},
+}
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _count(host, field):
+    with _stats_lock:
+        counters = _stats.setdefault(host, {"requests": 0, "misses": 0})
+        counters[field] += 1
+
+
+class _CountingMixin:
+    # Every request asks the pool for a connection; only misses have to open (and TLS-handshake) a new one
+    def _get_conn(self, timeout=None):
+        _count(self.host, "requests")
+        return super()._get_conn(timeout)
+
+    def _new_conn(self):
+        _count(self.host, "misses")
+        return super()._new_conn()
+
+
+class _CountingHTTPConnectionPool(_CountingMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """
+    Process-wide HTTP layer. Sessions are shared across threads and keep
+    keep-alive pools per host, so repeated calls to youtube.com or the Gemini
+    API reuse warm TLS connections instead of handshaking every time.
+    """
+
+    _lock = threading.Lock()
+    _sessions = {}
+
+    @staticmethod
+    def _build_retry(policy):
+        return Retry(
+            total=policy.get("retries", 0),
+            backoff_factor=policy.get("backoff", 0),
+            status_forcelist=policy.get("status_forcelist", ()),
+            allowed_methods=policy.get("allowed_methods", Retry.DEFAULT_ALLOWED_METHODS),
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+
+    @staticmethod
+    def _build_adapter(policy):
+        pool_size = policy.get("pool_size", DEFAULT_POOL_SIZE)
+        return _PooledAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=HttpClient._build_retry(policy),
+        )
+
+    @staticmethod
+    def _build_session():
+        session = requests.Session()
+        session.mount("http://", HttpClient._build_adapter(HOST_POLICIES["default"]))
+        session.mount("https://", HttpClient._build_adapter(HOST_POLICIES["default"]))
+        for host, policy in HOST_POLICIES.items():
+            if host != "default":
+                session.mount(f"https://{host}/", HttpClient._build_adapter(policy))
+        return session
+
+    @staticmethod
+    def session(name="default"):
+        """Return the shared session for ``name``. Libraries that mutate session state get their own name."""
+        session = HttpClient._sessions.get(name)
+        if session is None:
+            with HttpClient._lock:
+                session = HttpClient._sessions.get(name)
+                if session is None:
+                    session = HttpClient._build_session()
+                    HttpClient._sessions[name] = session
+        return session
+
+    @staticmethod
+    def configure_host(host, retries=None, backoff=None, status_forcelist=None, pool_size=None):
+        policy = dict(HOST_POLICIES.get(host, HOST_POLICIES["default"]))
+        if retries is not None:
+            policy["retries"] = retries
+        if backoff is not None:
+            policy["backoff"] = backoff
+        if status_forcelist is not None:
+            policy["status_forcelist"] = tuple(status_forcelist)
+        if pool_size is not None:
+            policy["pool_size"] = pool_size
+
+        with HttpClient._lock:
+            HOST_POLICIES[host] = policy
+            for session in HttpClient._sessions.values():
+                prefix = "https://" if host == "default" else f"https://{host}/"
+                session.mount(prefix, HttpClient._build_adapter(policy))
+
+    @staticmethod
+    def request(method, url, timeout=None, session="default", **kwargs):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        return HttpClient.session(session).request(method, url, timeout=timeout, **kwargs)
+
+    @staticmethod
+    def get(url, **kwargs):
+        return HttpClient.request("GET", url, **kwargs)
+
+    @staticmethod
+    def post(url, **kwargs):
+        return HttpClient.request("POST", url, **kwargs)
+
+    @staticmethod
+    def stats():
+        with _stats_lock:
+            snapshot = {}
+            for host, counters in _stats.items():
+                snapshot[host] = {
+                    "requests": counters["requests"],
+                    "hits": counters["requests"] - counters["misses"],
+                    "misses": counters["misses"],
+                }
+            return snapshot
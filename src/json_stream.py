@@ -0,0 +1,134 @@
+import re
+import json
+
+_OUTSIDE_STRING = re.compile(rb'[{}"]')
+_INSIDE_STRING = re.compile(rb'["\\]')
+
+MAX_OBJECT_BYTES = 16 * 1024 * 1024
+
+
+class JsonStreamExtractor:
+    """
+    Pulls ``var <marker> = {...};`` objects out of an HTML byte stream.
+
+    Objects are delimited by brace matching (string and escape aware), so the
+    result is never cut short by a ``};`` inside a string, and the caller can
+    stop reading the response as soon as every marker has been found. Braces,
+    quotes and backslashes are ASCII, so scanning raw UTF-8 bytes is safe even
+    when a chunk boundary splits a multi-byte character.
+    """
+
+    def __init__(self, markers):
+        self.pending = list(markers)
+        self.results = {}
+        self.bytes_read = 0
+        self._patterns = {m: re.compile(re.escape(m.encode()) + rb'\s*=\s*\{') for m in self.pending}
+        self._tail = max(len(m) for m in self.pending) + 64 if self.pending else 0
+        self._search_buf = b""
+        self._current = None
+        self._obj = None
+
+    @property
+    def done(self):
+        return not self.pending
+
+    def feed(self, chunk):
+        self.bytes_read += len(chunk)
+        if self._current is None:
+            self._search(self._search_buf + chunk)
+        else:
+            self._obj += chunk
+            remainder = self._scan()
+            if remainder is not None:
+                self._search(remainder)
+        return self.done
+
+    def _search(self, data):
+        while self.pending:
+            best = None
+            for marker in self.pending:
+                match = self._patterns[marker].search(data)
+                if match and (best is None or match.start() < best[1].start()):
+                    best = (marker, match)
+
+            if best is None:
+                # Keep enough of the tail to match a marker split across chunks
+                self._search_buf = data[-self._tail:]
+                return
+
+            marker, match = best
+            self._current = marker
+            self._obj = bytearray(data[match.end() - 1:])
+            self._pos = 1
+            self._depth = 1
+            self._in_string = False
+            self._search_buf = b""
+            remainder = self._scan()
+            if remainder is None:
+                return
+            data = remainder
+
+    def _scan(self):
+        data = self._obj
+        pos = self._pos
+        while pos < len(data):
+            if self._in_string:
+                match = _INSIDE_STRING.search(data, pos)
+                if not match:
+                    pos = len(data)
+                    break
+                if match.group() == b'"':
+                    self._in_string = False
+                    pos = match.end()
+                else:
+                    # Skip the escaped character, which may not have arrived yet
+                    pos = match.end() + 1
+            else:
+                match = _OUTSIDE_STRING.search(data, pos)
+                if not match:
+                    pos = len(data)
+                    break
+                char = match.group()
+                pos = match.end()
+                if char == b'"':
+                    self._in_string = True
+                elif char == b'{':
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        return self._finish(pos)
+
+        self._pos = pos
+        if len(data) > MAX_OBJECT_BYTES:
+            # Not a real object; give up on this marker
+            self.pending.remove(self._current)
+            self._current = None
+            self._obj = None
+        return None
+
+    def _finish(self, end):
+        data = bytes(self._obj)
+        try:
+            self.results[self._current] = json.loads(data[:end].decode("utf-8"))
+        except ValueError:
+            self.results[self._current] = None
+        self.pending.remove(self._current)
+        self._current = None
+        self._obj = None
+        return data[end:]
+
+
+def extract_json_objects(response, markers, chunk_size=64 * 1024):
+    """
+    Read a streamed ``requests`` response until every marker object is complete.
+    Returns (results, bytes_read); the rest of the body is never downloaded.
+    """
+    extractor = JsonStreamExtractor(markers)
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk and extractor.feed(chunk):
+                break
+    finally:
+        response.close()
+    return extractor.results, extractor.bytes_read
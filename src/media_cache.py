@@ -0,0 +1,189 @@
+import os
+import time
+import shutil
+import hashlib
+from src.transcript_cache import TranscriptCache, _env_float
+
+DEFAULT_MEDIA_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-youtube-video-summarizer", "media")
+
+# The File API keeps uploads for 48 hours; stop trusting a handle a little before that
+FILE_API_RETENTION = 48 * 3600
+
+
+class MediaCache:
+    """
+    Two-tier cache for the audio fallback, so Summary, Timestamps and
+    Transcript on the same uncaptioned video download, upload and wait for
+    PROCESSING only once.
+
+    * Audio store: prepared audio files named by the SHA-256 of their content
+      (``audio/<digest><ext>``), with a small per-video index pointing at them.
+      Expired after MEDIA_CACHE_TTL and evicted least-recently-used beyond
+      MEDIA_CACHE_MAX_MB.
+    * File registry: the Gemini File API name uploaded for each video and the
+      digest it was uploaded from, trusted for GEMINI_FILE_TTL (just under the
+      API's 48h retention). Expired uploads are removed by the API itself.
+    """
+
+    @staticmethod
+    def enabled():
+        return os.getenv("MEDIA_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+    @staticmethod
+    def directory(kind):
+        path = os.path.join(os.getenv("MEDIA_CACHE_DIR") or DEFAULT_MEDIA_DIR, kind)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def ttl():
+        return _env_float("MEDIA_CACHE_TTL", 3 * 24 * 3600)
+
+    @staticmethod
+    def file_ttl():
+        return min(_env_float("GEMINI_FILE_TTL", 47 * 3600), FILE_API_RETENTION)
+
+    @staticmethod
+    def max_bytes():
+        return int(_env_float("MEDIA_CACHE_MAX_MB", 1024) * 1024 * 1024)
+
+    @staticmethod
+    def _digest_file(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as fp:
+            for block in iter(lambda: fp.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _index_path(video_id):
+        return os.path.join(MediaCache.directory("index"), f"{video_id}.json")
+
+    @staticmethod
+    def _file_path(video_id):
+        return os.path.join(MediaCache.directory("files"), f"{video_id}.json")
+
+    @staticmethod
+    def _blob_path(digest, ext):
+        return os.path.join(MediaCache.directory("audio"), f"{digest}{ext}")
+
+    @staticmethod
+    def get_audio(video_id):
+        """Return (path, mime_type, digest) of the stored audio for ``video_id``, or None."""
+        if not MediaCache.enabled() or not video_id:
+            return None
+
+        index_path = MediaCache._index_path(video_id)
+        entry = TranscriptCache._read_json(index_path)
+        if not entry:
+            return None
+
+        path = MediaCache._blob_path(entry["digest"], entry.get("ext", ""))
+        if time.time() - entry.get("created", 0) > MediaCache.ttl() or not os.path.exists(path):
+            TranscriptCache._remove(index_path)
+            return None
+
+        try:
+            now = time.time()
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return path, entry.get("mime_type"), entry["digest"]
+
+    @staticmethod
+    def put_audio(video_id, path, mime_type=None):
+        """
+        Move ``path`` into the store and return ``(stored_path, digest)``. When the
+        cache is disabled or the write fails the original path is returned.
+        """
+        try:
+            digest = MediaCache._digest_file(path)
+        except OSError:
+            return path, None
+        if not MediaCache.enabled() or not video_id:
+            return path, digest
+
+        ext = os.path.splitext(path)[1]
+        stored = MediaCache._blob_path(digest, ext)
+        try:
+            if not os.path.exists(stored):
+                # Copy next to the target first so the store never holds a partial file
+                tmp_path = f"{stored}.{os.getpid()}.tmp"
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, stored)
+            TranscriptCache._write_json(
+                MediaCache._index_path(video_id),
+                {"digest": digest, "ext": ext, "mime_type": mime_type, "created": time.time()},
+            )
+            MediaCache.evict()
+        except OSError as e:
+            print(f"Media cache write failed for {video_id}: {str(e)}")
+            return path, digest
+        return stored, digest
+
+    @staticmethod
+    def get_file(video_id):
+        """Return the registered File API name for ``video_id``, or None if unknown or too old."""
+        if not MediaCache.enabled() or not video_id:
+            return None
+
+        path = MediaCache._file_path(video_id)
+        entry = TranscriptCache._read_json(path)
+        if not entry:
+            return None
+        if time.time() - entry.get("created", 0) > MediaCache.file_ttl():
+            TranscriptCache._remove(path)
+            return None
+        return entry.get("name")
+
+    @staticmethod
+    def put_file(video_id, name, digest=None):
+        if not MediaCache.enabled() or not video_id or not name:
+            return
+        try:
+            TranscriptCache._write_json(
+                MediaCache._file_path(video_id),
+                {"name": name, "digest": digest, "created": time.time()},
+            )
+        except OSError as e:
+            print(f"Media cache write failed for {video_id}: {str(e)}")
+
+    @staticmethod
+    def drop_file(video_id):
+        TranscriptCache._remove(MediaCache._file_path(video_id))
+
+    @staticmethod
+    def evict():
+        now = time.time()
+        for kind, ttl in (("index", MediaCache.ttl()), ("files", MediaCache.file_ttl())):
+            directory = MediaCache.directory(kind)
+            for name in os.listdir(directory):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                entry = TranscriptCache._read_json(path)
+                if not entry or now - entry.get("created", 0) > ttl:
+                    TranscriptCache._remove(path)
+
+        directory = MediaCache.directory("audio")
+        limit = MediaCache.max_bytes()
+        files = []
+        total = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > MediaCache.ttl():
+                TranscriptCache._remove(path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        files.sort()
+        for _, size, path in files:
+            if total <= limit:
+                break
+            TranscriptCache._remove(path)
+            total -= size
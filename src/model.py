@@ -1,40 +1,223 @@
 import os
-import requests
+import time
+import tempfile
+import threading
+from src.http_client import HttpClient
+from src.video_info import GetVideo
+from src.video_probe import VideoProbe
+from src.prompt import Prompt
+from src.segments import format_hms
+from src.response_cache import ResponseCache, request_key
+from src.negative_cache import NegativeCache, classify_error, is_hard_failure, OUTCOME_MESSAGES
+from src.gemini_client import GeminiClient, QuotaExceeded, QUOTA_ERROR_PREFIX, GEMINI_API_BASE
+from src.context_cache import ContextCache
+from src.token_budget import TokenBudget, MAP_REDUCE
+from src.audio_prep import prepare_audio, segment_windows, cut_audio, AUDIO_SEGMENT_OVERLAP
+from src.timestamp_formatter import TimestampFormatter
+from src.media_cache import MediaCache
+from src.single_flight import SingleFlight
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+GEMINI_MODEL = "gemini-2.5-flash"
+
+GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "topK": 20,
+    "topP": 0.9,
+    "maxOutputTokens": 8192,
+}
+
+VIDEO_MODEL = "gemini-2.0-flash"
+VIDEO_GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "top_p": 0.9,
+    "top_k": 20,
+    "max_output_tokens": 8192,
+}
+
+# One call returns summary, chapters and key takeaways as JSON
+GEMINI_STRUCTURED = os.getenv("GEMINI_STRUCTURED", "1").lower() in ("1", "true", "yes")
+
+STRUCTURED_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING"},
+        "chapters": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "start_seconds": {"type": "INTEGER"},
+                    "title": {"type": "STRING"},
+                },
+                "required": ["start_seconds", "title"],
+                "propertyOrdering": ["start_seconds", "title"],
+            },
+        },
+        "key_takeaways": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["summary", "chapters", "key_takeaways"],
+    "propertyOrdering": ["summary", "chapters", "key_takeaways"],
+}
+
+STRUCTURED_GENERATION_CONFIG = dict(
+    GENERATION_CONFIG,
+    responseMimeType="application/json",
+    responseSchema=STRUCTURED_SCHEMA,
+)
+
+# Uploaded audio is usually ACTIVE within seconds; poll fast first, then back off
+FILE_POLL_INITIAL = float(os.getenv("GEMINI_FILE_POLL_INITIAL", "0.5"))
+FILE_POLL_MAX = float(os.getenv("GEMINI_FILE_POLL_MAX", "5"))
+FILE_PROCESSING_TIMEOUT = float(os.getenv("GEMINI_FILE_PROCESSING_TIMEOUT", "300"))
+
+# Transcripts over the token budget (see TokenBudget) are summarized chunk by chunk and merged
+GEMINI_MAP_CONCURRENCY = int(os.getenv("GEMINI_MAP_CONCURRENCY", "4"))
+AUDIO_SEGMENT_CONCURRENCY = int(os.getenv("AUDIO_SEGMENT_CONCURRENCY", "4"))
+
 class Model:
     @staticmethod
-    def google_gemini(transcript, prompt, extra=""):
-        if not transcript:
-            return "⚠️ No transcript available for this video. The video may not have captions."
+    def is_quota_error(result):
+        # Quota errors are not about the content; the audio fallback would hit the same wall
+        return isinstance(result, str) and result.startswith(QUOTA_ERROR_PREFIX)
 
+    @staticmethod
+    def _request_body(full_prompt, cached_content=None, generation_config=None):
+        if cached_content:
+            # The transcript lives in the cached content; only the instructions are sent
+            return {
+                "cachedContent": cached_content,
+                "contents": [{"role": "user", "parts": [{"text": full_prompt}]}],
+                "generationConfig": generation_config or GENERATION_CONFIG,
+            }
+        return {
+            "contents": [{"parts": [{"text": full_prompt}]}],
+            "generationConfig": generation_config or GENERATION_CONFIG,
+        }
+
+    @staticmethod
+    def _inline_prompt(full_prompt, context=None):
+        return f"{full_prompt}\n\nVideo Transcript: {context}" if context else full_prompt
+
+    @staticmethod
+    def _calibrate(sample):
         try:
             load_dotenv()
             api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
-
             if not api_key:
-                return "⚠️ Missing Gemini API key. Please add your API key to the .env file."
+                TokenBudget.calibration_failed()
+                return
+            response = HttpClient.post(
+                f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:countTokens?key={api_key}",
+                headers={"Content-Type": "application/json"},
+                data=json.dumps({"contents": [{"parts": [{"text": sample}]}]}),
+                timeout=15,
+            )
+            if response.status_code == 200:
+                TokenBudget.record_count(sample, response.json().get("totalTokens"))
+            else:
+                TokenBudget.calibration_failed()
+        except Exception as e:
+            print(f"Token calibration failed: {str(e)}")
+            TokenBudget.calibration_failed()
 
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={api_key}"
-            headers = {"Content-Type": "application/json"}
+    @staticmethod
+    def _plan_request(transcript, prompt, extra="", segments=None, use_cache=True):
+        """
+        Fit a transcript into the token budget. Returns ``(full_prompt, context)``:
+        ``context`` is the (possibly compacted) transcript to send inline or through
+        the context cache, or None after map-reduce, whose notes are already part of
+        ``full_prompt``. Errors come back as a "⚠️" ``full_prompt``.
+        """
+        instructions = f"{prompt}\n\n{extra}"
+        # With segments every mode sends the same timed text, so one context cache entry serves them all
+        text = segments.timed() if segments else transcript
 
-            if len(transcript) > 60000:
-                transcript = transcript[:60000] + "... (transcript truncated)"
+        sample = TokenBudget.calibration_sample(text)
+        if sample:
+            # Measuring is not on the critical path; the next plan benefits from it
+            threading.Thread(target=Model._calibrate, args=(sample,), daemon=True).start()
 
-            full_prompt = f"{prompt}\n\n{extra}\n\nVideo Transcript: {transcript}"
+        plan = TokenBudget.plan(
+            text, GEMINI_MODEL, TokenBudget.estimate(instructions), GENERATION_CONFIG["maxOutputTokens"],
+            language=segments.language if segments else None,
+        )
+        if plan["strategy"] != MAP_REDUCE:
+            return instructions, plan["text"]
+        if segments:
+            return Model._map_reduce_prompt(segments, prompt, extra, plan["chunk_chars"], use_cache=use_cache), None
+        # Plain text has no timing to chunk by; send as much as fits
+        return instructions, text[:plan["chunk_chars"]] + "... (transcript truncated)"
 
-            data = {
-                "contents": [{"parts": [{"text": full_prompt}]}],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "topK": 20,
-                    "topP": 0.9,
-                    "maxOutputTokens": 8192,
-                }
-            }
+    @staticmethod
+    def _cache_gone(response):
+        """True when a failed request was rejected because its cachedContent no longer exists."""
+        if response.status_code not in (400, 403, 404):
+            return False
+        try:
+            error = response.json().get("error") or {}
+        except ValueError:
+            return False
+        # Other 4xx (bad key, bad schema, safety) would fail inline too and must reach the caller
+        return error.get("status") == "NOT_FOUND" or "cachedcontent" in str(error.get("message", "")).lower()
 
-            response = requests.post(url, headers=headers, data=json.dumps(data), timeout=60)
+    @staticmethod
+    def _post(url, headers, full_prompt, context, api_key, generation_config=None, **kwargs):
+        """POST a generate request, referencing ``context`` through the context cache when possible."""
+        inline = Model._request_body(Model._inline_prompt(full_prompt, context), generation_config=generation_config)
+        tokens = GeminiClient.estimate_tokens(Model._inline_prompt(full_prompt, context))
+        handle = ContextCache.handle(GEMINI_MODEL, context, api_key) if context else None
+        if handle:
+            response = GeminiClient.post(
+                url, json.dumps(Model._request_body(full_prompt, handle, generation_config)), tokens,
+                headers=headers, **kwargs,
+            )
+            if not Model._cache_gone(response):
+                return response
+            # The cache expired or was deleted behind our back; forget it and send the transcript inline
+            response.close()
+            ContextCache.invalidate(handle)
+        return GeminiClient.post(url, json.dumps(inline), tokens, headers=headers, **kwargs)
+
+    @staticmethod
+    def _cache_key(data):
+        # Streaming and non-streaming calls share entries: the answer is the same
+        return request_key("generateContent", GEMINI_MODEL, data)
+
+    @staticmethod
+    def _generate(full_prompt, use_cache=True, context=None, generation_config=None):
+        data = Model._request_body(Model._inline_prompt(full_prompt, context), generation_config=generation_config)
+        cache_key = Model._cache_key(data)
+        cached = ResponseCache.get(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+        # Identical prompts from other sessions share one call
+        return SingleFlight.do(
+            cache_key,
+            lambda: Model._generate_call(full_prompt, cache_key, use_cache, context, generation_config),
+        )
+
+    @staticmethod
+    def _generate_call(full_prompt, cache_key, use_cache, context, generation_config):
+        # A waiter from another process finds the leader's answer here
+        cached = ResponseCache.get(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+        try:
+            load_dotenv()
+            api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
+
+            if not api_key:
+                return "⚠️ Missing Gemini API key. Please add your API key to the .env file."
+
+            url = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent?key={api_key}"
+            headers = {"Content-Type": "application/json"}
+
+            response = Model._post(url, headers, full_prompt, context, api_key, generation_config, timeout=60)
 
             if response.status_code == 200:
                 result = response.json()
@@ -42,7 +225,9 @@ class Model:
                     if "content" in result["candidates"][0] and "parts" in result["candidates"][0]["content"]:
                         parts = result["candidates"][0]["content"]["parts"]
                         texts = [part.get("text", "") for part in parts if "text" in part]
-                        return "\n".join(texts)
+                        text = "\n".join(texts)
+                        ResponseCache.put(cache_key, text)
+                        return text
                 return "⚠️ Could not parse API response."
             else:
                 error_msg = f"API error (HTTP {response.status_code})"
@@ -54,20 +239,462 @@ class Model:
                     pass
                 return f"⚠️ {error_msg}"
 
+        except QuotaExceeded as e:
+            return f"{QUOTA_ERROR_PREFIX}: {str(e)}. Please try again in a minute."
         except Exception as e:
             return f"⚠️ Error with Gemini API: {str(e)}"
 
     @staticmethod
-    def google_gemini_video(video_url, prompt):
+    def google_gemini(transcript, prompt, extra="", segments=None, use_cache=True):
+        if not transcript:
+            return "⚠️ No transcript available for this video. The video may not have captions."
+
+        full_prompt, context = Model._plan_request(transcript, prompt, extra, segments, use_cache)
+        if full_prompt.startswith("⚠️"):
+            return full_prompt
+        return Model._generate(full_prompt, use_cache, context=context)
+
+    @staticmethod
+    def _map_reduce_prompt(segments, prompt, extra="", chunk_chars=None, concurrency=None, use_cache=True):
+        chunks = segments.chunks(chunk_chars or TokenBudget.chunk_chars(segments.timed()))
+        if len(chunks) == 1:
+            return f"{prompt}\n\n{extra}\n\nVideo Transcript: {chunks[0].timed()}"
+
+        def summarize_chunk(index, chunk):
+            chunk_prompt = Prompt.chunk_prompt(index + 1, len(chunks), format_hms(chunk.start()), format_hms(chunk.end()))
+            return Model._generate(f"{chunk_prompt}\n\nVideo Transcript: {chunk.timed()}", use_cache)
+
+        workers = max(1, min(concurrency or GEMINI_MAP_CONCURRENCY, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini-map") as executor:
+            notes = list(executor.map(summarize_chunk, range(len(chunks)), chunks))
+
+        for note in notes:
+            if not note or note.startswith("⚠️"):
+                return note or "⚠️ Could not summarize part of the transcript."
+
+        combined = "\n\n".join(
+            f"Part {i + 1} [{format_hms(chunk.start())} - {format_hms(chunk.end())}]:\n{note}"
+            for i, (chunk, note) in enumerate(zip(chunks, notes))
+        )
+        return f"{prompt}\n\n{extra}\n\n{Prompt.reduce_extra(len(chunks))}\n\n{combined}"
+
+    @staticmethod
+    def google_gemini_map_reduce(segments, prompt, extra="", chunk_chars=None, concurrency=None, use_cache=True):
+        """
+        Summarize a long transcript without truncating it: each time-aligned chunk is
+        condensed into timestamped notes in parallel, then the notes are merged with
+        the original prompt in one final call.
+        """
+        full_prompt = Model._map_reduce_prompt(segments, prompt, extra, chunk_chars, concurrency, use_cache)
+        if full_prompt.startswith("⚠️"):
+            return full_prompt
+        return Model._generate(full_prompt, use_cache)
+
+    @staticmethod
+    def _parse_structured(text, duration=None):
+        try:
+            data = json.loads(text)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("summary"), str):
+            return None
+
+        chapters = []
+        for chapter in data.get("chapters") or []:
+            try:
+                start = max(0, int(chapter["start_seconds"]))
+                title = str(chapter["title"]).strip()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not title or (duration and start > duration):
+                continue
+            chapters.append({"start_seconds": start, "title": title})
+        chapters.sort(key=lambda c: c["start_seconds"])
+
+        return {
+            "summary": data["summary"].strip(),
+            "chapters": chapters,
+            "key_takeaways": [str(t).strip() for t in data.get("key_takeaways") or [] if str(t).strip()],
+        }
+
+    @staticmethod
+    def structured_text(data, mode):
+        """Markdown for ``mode`` ("summary" or "timestamps") from a structured result, or None if it has none."""
+        if not isinstance(data, dict):
+            return None
+        if mode == "summary":
+            text = data["summary"]
+            if data["key_takeaways"]:
+                text += "\n\n**Key Takeaways**\n" + "\n".join(f"- {t}" for t in data["key_takeaways"])
+            return text
+        if mode == "timestamps" and data["chapters"]:
+            return TimestampFormatter.format_chapters(data["chapters"])
+        return None
+
+    @staticmethod
+    def google_gemini_structured(segments, language, use_cache=True):
+        """
+        Summary, chapters and key takeaways in one JSON-schema constrained call.
+        Returns a dict, a "⚠️" error string, or None when structured mode is off.
+        The parsed result is cached per video, caption track and output language.
+        """
+        if not GEMINI_STRUCTURED:
+            return None
+        if not segments:
+            return "⚠️ No transcript available for this video. The video may not have captions."
+
+        prompt = Prompt.structured_prompt(language)
+        cache_key = request_key(
+            "structured", GEMINI_MODEL, STRUCTURED_SCHEMA, prompt,
+            segments.video_id, segments.language, len(segments), segments.end(),
+        )
+        cached = ResponseCache.get(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+        # The raw JSON is not cached: a malformed answer must not stick around
+        full_prompt, context = Model._plan_request(segments.timed(), prompt, segments=segments, use_cache=use_cache)
+        if full_prompt.startswith("⚠️"):
+            return full_prompt
+        text = Model._generate(full_prompt, False, context=context, generation_config=STRUCTURED_GENERATION_CONFIG)
+
+        if not text or text.startswith("⚠️"):
+            return text or "⚠️ Could not parse API response."
+
+        # Chapters past the last caption (plus a little slack) are hallucinated
+        result = Model._parse_structured(text, segments.end() + 60)
+        if result is None:
+            return "⚠️ Could not parse the structured API response."
+        ResponseCache.put(cache_key, result)
+        return result
+
+    @staticmethod
+    def _parse_candidate_text(result):
+        candidates = result.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts if "text" in part)
+
+    @staticmethod
+    def _generate_stream(full_prompt, use_cache=True, context=None):
+        """Yield text deltas from streamGenerateContent (server-sent events)."""
+        data = Model._request_body(Model._inline_prompt(full_prompt, context))
+        cache_key = Model._cache_key(data)
+        cached = ResponseCache.get(cache_key, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        yield from SingleFlight.stream(
+            cache_key, lambda: Model._generate_stream_call(full_prompt, cache_key, use_cache, context)
+        )
+
+    @staticmethod
+    def _generate_stream_call(full_prompt, cache_key, use_cache, context):
+        cached = ResponseCache.get(cache_key, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        load_dotenv()
+        api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
+
+        if not api_key:
+            yield "⚠️ Missing Gemini API key. Please add your API key to the .env file."
+            return
+
+        url = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={api_key}"
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+
+        produced = []
+        try:
+            response = Model._post(url, headers, full_prompt, context, api_key, timeout=60, stream=True)
+            try:
+                if response.status_code != 200:
+                    error_msg = f"API error (HTTP {response.status_code})"
+                    try:
+                        error_info = response.json()
+                        if isinstance(error_info, list):
+                            error_info = error_info[0]
+                        if "error" in error_info and "message" in error_info["error"]:
+                            error_msg += f": {error_info['error']['message']}"
+                    except:
+                        pass
+                    yield f"⚠️ {error_msg}"
+                    return
+
+                # SSE is UTF-8 by definition; without a charset requests would decode it as ISO-8859-1
+                response.encoding = "utf-8"
+                event_data = []
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        event_data.append(line[5:].strip())
+                        continue
+                    if line or not event_data:
+                        continue
+                    # Blank line ends the event
+                    text = Model._parse_candidate_text(json.loads("\n".join(event_data)))
+                    event_data = []
+                    if text:
+                        produced.append(text)
+                        yield text
+                if event_data:
+                    text = Model._parse_candidate_text(json.loads("\n".join(event_data)))
+                    if text:
+                        produced.append(text)
+                        yield text
+            finally:
+                response.close()
+
+            if not produced:
+                yield "⚠️ Could not parse API response."
+            else:
+                ResponseCache.put(cache_key, "".join(produced))
+
+        except QuotaExceeded as e:
+            yield f"{QUOTA_ERROR_PREFIX}: {str(e)}. Please try again in a minute."
+        except Exception as e:
+            if produced:
+                yield f"\n\n⚠️ Response was cut off: {str(e)}"
+            else:
+                yield f"⚠️ Error with Gemini API: {str(e)}"
+
+    @staticmethod
+    def google_gemini_stream(transcript, prompt, extra="", segments=None, use_cache=True):
+        """Same as google_gemini, but yields the answer as it is generated."""
+        if not transcript:
+            yield "⚠️ No transcript available for this video. The video may not have captions."
+            return
+
+        # After map-reduce the map step has already finished; only the final merge is streamed
+        full_prompt, context = Model._plan_request(transcript, prompt, extra, segments, use_cache)
+        if full_prompt.startswith("⚠️"):
+            yield full_prompt
+            return
+        yield from Model._generate_stream(full_prompt, use_cache, context=context)
+
+    @staticmethod
+    def _wait_for_file(genai, myfile):
+        delay = FILE_POLL_INITIAL
+        deadline = time.monotonic() + FILE_PROCESSING_TIMEOUT
+        while myfile.state.name == "PROCESSING" and time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 1.5, FILE_POLL_MAX)
+            myfile = genai.get_file(myfile.name)
+        return myfile
+
+    @staticmethod
+    def _local_audio(video_id, directory):
+        """Return (path, mime_type, digest) of the prepared audio, from the store or freshly made in ``directory``."""
+        stored = MediaCache.get_audio(video_id)
+        if stored:
+            return stored
+
+        audio_path, mime_type = prepare_audio(video_id, directory)
+        if not audio_path or not os.path.exists(audio_path):
+            return None
+        audio_path, digest = MediaCache.put_audio(video_id, audio_path, mime_type)
+        return audio_path, mime_type, digest
+
+    @staticmethod
+    def _cached_upload(genai, key):
+        name = MediaCache.get_file(key)
+        if not name:
+            return None
+        try:
+            myfile = Model._wait_for_file(genai, genai.get_file(name))
+            if myfile.state.name == "ACTIVE":
+                return myfile
+        except Exception as e:
+            print(f"Cached upload {name} for {key} is gone: {str(e)}")
+        MediaCache.drop_file(key)
+        return None
+
+    @staticmethod
+    def _upload(genai, key, path, mime_type, digest):
+        # Without a MIME type Gemini infers it from the extension (e.g., .m4a, .webm)
+        started = time.perf_counter()
+        if mime_type:
+            myfile = genai.upload_file(path, mime_type=mime_type)
+        else:
+            myfile = genai.upload_file(path)
+        VideoProbe.record_timing("audio_upload", time.perf_counter() - started)
+
+        # Wait for processing
+        started = time.perf_counter()
+        myfile = Model._wait_for_file(genai, myfile)
+        VideoProbe.record_timing("audio_processing", time.perf_counter() - started)
+
+        if myfile.state.name != "ACTIVE":
+            return None
+        MediaCache.put_file(key, myfile.name, digest)
+        return myfile
+
+    @staticmethod
+    def _uploaded_audio(genai, video_id):
+        """
+        Return an ACTIVE File API handle holding the audio of ``video_id``, reusing a
+        previous upload or stored audio when possible. Returns None if it cannot be made.
+        """
+        myfile = Model._cached_upload(genai, video_id)
+        if myfile is not None:
+            return myfile
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            local = Model._local_audio(video_id, tmpdirname)
+            if not local:
+                return None
+            return Model._upload(genai, video_id, *local)
+
+    @staticmethod
+    def _generate_audio(genai, myfile, prompt, duration, on_delta=None):
+        model = genai.GenerativeModel(VIDEO_MODEL)
+        # Audio is billed at roughly 32 tokens per second
+        tokens = int(duration or 0) * 32 + GeminiClient.estimate_tokens(prompt)
+        response = GeminiClient.call_sdk(
+            lambda: model.generate_content(
+                [myfile, prompt],
+                generation_config=genai.types.GenerationConfig(**VIDEO_GENERATION_CONFIG),
+                stream=on_delta is not None,
+            ),
+            tokens,
+        )
+
+        text = None
+        if response and on_delta is not None:
+            text = ""
+            for chunk in response:
+                if chunk.text:
+                    text += chunk.text
+                    on_delta(chunk.text)
+        elif response:
+            text = response.text
+
+        # Uploads are kept for the other modes; without the media cache they are not reused
+        if not MediaCache.enabled():
+            myfile.delete()
+        return text
+
+    @staticmethod
+    def _google_gemini_video_segmented(genai, video_id, prompt, windows, merge, on_delta=None, use_cache=True):
+        """
+        Long audio: every window is cut, uploaded and answered concurrently with
+        clip-relative timestamps, which are then shifted to the full video's clock.
+        ``merge="concat"`` joins the parts in order (transcripts); ``"reduce"`` turns
+        them into notes and merges the notes with ``prompt`` in one text call.
+        """
+        total = len(windows)
+
+        def segment_prompt(index):
+            start, length = windows[index]
+            overlap = int(min(AUDIO_SEGMENT_OVERLAP, start)) if merge == "concat" else 0
+            extra = Prompt.audio_segment_extra(index + 1, total, format_hms(start), format_hms(start + length), overlap)
+            if merge == "concat":
+                return f"{prompt}\n\n{extra}"
+            return f"{Prompt.chunk_prompt(index + 1, total, format_hms(start), format_hms(start + length))}\n\n{extra}"
+
+        def process(index, directory, local_audio):
+            start, length = windows[index]
+            key = f"{video_id}.{int(start)}-{int(length)}"
+            part_prompt = segment_prompt(index)
+            cache_key = request_key("video-segment", VIDEO_MODEL, key, part_prompt, VIDEO_GENERATION_CONFIG)
+            cached = ResponseCache.get(cache_key, use_cache)
+            if cached is not None:
+                return cached
+
+            myfile = Model._cached_upload(genai, key)
+            if myfile is None:
+                local = local_audio()
+                if not local:
+                    return None
+                path, mime_type, _ = local
+                myfile = Model._upload(genai, key, cut_audio(path, directory, start, length), mime_type, None)
+            if myfile is None:
+                return None
+
+            text = Model._generate_audio(genai, myfile, part_prompt, length)
+            if not text:
+                return None
+            text = TimestampFormatter.shift(text, start)
+            ResponseCache.put(cache_key, text)
+            return text
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            # The full audio is only needed for windows that were never uploaded
+            lock = threading.Lock()
+            local = {}
+
+            def local_audio():
+                with lock:
+                    if "audio" not in local:
+                        local["audio"] = Model._local_audio(video_id, tmpdirname)
+                    return local["audio"]
+
+            workers = max(1, min(AUDIO_SEGMENT_CONCURRENCY, total))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini-audio") as executor:
+                futures = [executor.submit(process, i, tmpdirname, local_audio) for i in range(total)]
+                parts = []
+                for future in futures:
+                    # Parts finish in any order; a transcript is streamed as soon as its prefix is complete
+                    part = future.result()
+                    if not part:
+                        return None
+                    parts.append(part)
+                    if merge == "concat" and on_delta is not None:
+                        on_delta(part if len(parts) == 1 else f"\n\n{part}")
+
+        if merge == "concat":
+            return "\n\n".join(parts)
+
+        combined = "\n\n".join(
+            f"Part {i + 1} [{format_hms(start)} - {format_hms(start + length)}]:\n{part}"
+            for i, ((start, length), part) in enumerate(zip(windows, parts))
+        )
+        full_prompt = f"{prompt}\n\n{Prompt.reduce_extra(total)}\n\n{combined}"
+        if on_delta is None:
+            return Model._generate(full_prompt, use_cache)
+        text = ""
+        for delta in Model._generate_stream(full_prompt, use_cache):
+            text += delta
+            on_delta(delta)
+        return text
+
+    @staticmethod
+    def _google_gemini_video_call(genai, video_id, prompt, on_delta, use_cache, merge, cache_key):
+        cached = ResponseCache.get(cache_key, use_cache)
+        if cached is not None:
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
+
+        probe = VideoProbe.get(video_id) or {}
+        windows = segment_windows(probe.get("duration"))
+        if windows:
+            text = Model._google_gemini_video_segmented(
+                genai, video_id, prompt, windows, merge, on_delta, use_cache
+            )
+        else:
+            myfile = Model._uploaded_audio(genai, video_id)
+            if myfile is None:
+                return None
+            text = Model._generate_audio(genai, myfile, prompt, probe.get("duration"), on_delta)
+
+        ResponseCache.put(cache_key, text)
+        return text
+
+    @staticmethod
+    def google_gemini_video(video_url, prompt, on_delta=None, use_cache=True, merge="reduce"):
         """
         Robust fallback: Downloads audio via yt-dlp, uploads to Gemini File API, 
         and generates content. Bypasses YouTube transcript blocks on cloud IPs.
+        If ``on_delta`` is given the answer is streamed and each piece is passed to it;
+        a call that joins another session's identical in-flight request gets no
+        deltas, only the finished text as the return value.
+        Long audio is processed in overlapping windows; ``merge`` says how the
+        parts are combined ("concat" for transcripts, "reduce" otherwise).
         """
         import google.generativeai as genai
-        import tempfile
-        import time
-        from pathlib import Path
-        import yt_dlp
 
         try:
             load_dotenv()
@@ -77,111 +704,46 @@ class Model:
 
             genai.configure(api_key=api_key)
 
-            # Check for YouTube cookies in env var (Netscape format content)
-            cookies_content = os.getenv("YOUTUBE_COOKIES")
-            cookie_file = None
-            cookie_path = None
-            
-            if cookies_content:
-                cookie_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.txt')
-                cookie_file.write(cookies_content)
-                cookie_file.flush()
-                cookie_path = cookie_file.name
-            elif os.path.exists("cookies.txt"):
-                cookie_path = "cookies.txt"
-            elif os.path.exists("/etc/secrets/cookies.txt"): # Common Render secret path
-                cookie_path = "/etc/secrets/cookies.txt"
-
-            # 1. Download Audio to Temp File
-            with tempfile.TemporaryDirectory() as tmpdirname:
-                # Prepare yt-dlp options based on available authentication
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'outtmpl': f'{tmpdirname}/%(id)s.%(ext)s',
-                    'quiet': True,
-                    'no_warnings': True,
-                }
-                
-                
-                # Check cookie file size/validity
-                cookie_debug = "No Cookie File"
-                if cookie_path:
-                    try:
-                        size = os.path.getsize(cookie_path)
-                        cookie_debug = f"Path: {cookie_path}, Size: {size} bytes"
-                    except:
-                        cookie_debug = f"Path: {cookie_path}, Error reading size"
-
-                # If we have cookies, use them. 
-                # Try standard 'web' client with specific User-Agent
-                if cookie_path:
-                    ydl_opts['cookiefile'] = cookie_path
-                    ydl_opts['user_agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                    ydl_opts['extractor_args'] = {
-                        'youtube': {
-                            'player_client': ['web'],
-                        }
-                    }
-                else:
-                    # No cookies = try Android client to bypass bot check
-                    ydl_opts['extractor_args'] = {
-                        'youtube': {
-                            'player_client': ['android', 'ios'],
-                        }
-                    }
-                
-                audio_path = None
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(video_url, download=True)
-                    audio_path = ydl.prepare_filename(info)
-
-                if not audio_path or not os.path.exists(audio_path):
-                    return None
+            video_id = GetVideo.Id(video_url)
+            known_outcome = NegativeCache.get(video_id)
+            if is_hard_failure(known_outcome):
+                return OUTCOME_MESSAGES[known_outcome]
 
-                # 2. Upload to Gemini
-                # Let Gemini infer MIME type from extension (e.g., .m4a, .webm)
-                myfile = genai.upload_file(audio_path)
-                
-                # Wait for processing
-                while myfile.state.name == "PROCESSING":
-                    time.sleep(2)
-                    myfile = genai.get_file(myfile.name)
+            cache_key = request_key("video", VIDEO_MODEL, video_id, prompt, VIDEO_GENERATION_CONFIG, merge)
+            cached = ResponseCache.get(cache_key, use_cache)
+            if cached is not None:
+                if on_delta is not None:
+                    on_delta(cached)
+                return cached
 
-                if myfile.state.name == "FAILED":
-                    return None
+            cookie_path = VideoProbe.cookie_path()
 
-                # 3. Generate Content
-                model = genai.GenerativeModel("gemini-2.0-flash")
-                response = model.generate_content(
-                    [myfile, prompt],
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.3,
-                        top_p=0.9,
-                        top_k=20,
-                        max_output_tokens=8192
-                    )
-                )
-                
-                # Cleanup remote file
-                myfile.delete()
-                
-                # Cleanup cookie file
-                if cookie_file and os.path.exists(cookie_file.name):
-                    os.unlink(cookie_file.name)
-
-                return response.text if response else None
+            # Check cookie file size/validity
+            cookie_debug = "No Cookie File"
+            if cookie_path:
+                try:
+                    size = os.path.getsize(cookie_path)
+                    cookie_debug = f"Path: {cookie_path}, Size: {size} bytes"
+                except:
+                    cookie_debug = f"Path: {cookie_path}, Error reading size"
 
+            # Sessions asking for the same video and prompt share one download and upload
+            return SingleFlight.do(
+                cache_key,
+                lambda: Model._google_gemini_video_call(genai, video_id, prompt, on_delta, use_cache, merge, cache_key),
+            )
+
+        except QuotaExceeded as e:
+            return f"{QUOTA_ERROR_PREFIX}: {str(e)}. Please try again in a minute."
         except Exception as e:
             error_msg = str(e)
             print(f"Video processing error: {error_msg}")
-            
-            # Cleanup cookie file in case of error
-            if 'cookie_file' in locals() and cookie_file and os.path.exists(cookie_file.name):
-                try:
-                    os.unlink(cookie_file.name)
-                except:
-                    pass
-            
+
+            outcome = classify_error(e)
+            if is_hard_failure(outcome):
+                NegativeCache.put(video_id if 'video_id' in locals() else None, outcome)
+                return OUTCOME_MESSAGES[outcome]
+
             # Add debug info to error message
             # cookie_debug variable is set earlier
             final_debug = cookie_debug if 'cookie_debug' in locals() else f"[Cookie Path: {cookie_path if 'cookie_path' in locals() else 'None'}]"
@@ -0,0 +1,143 @@
+import os
+import time
+from src.transcript_cache import TranscriptCache
+
+NO_CAPTIONS = "no_captions"
+PRIVATE = "private"
+AGE_RESTRICTED = "age_restricted"
+UNAVAILABLE = "unavailable"
+TRANSIENT = "transient"
+
+# Outcomes no amount of retrying (or audio download) will fix
+HARD_FAILURES = (PRIVATE, AGE_RESTRICTED, UNAVAILABLE)
+
+# Where VideoProbe.cookie_path looks for a signed-in cookie jar
+COOKIE_FILES = ("cookies.txt", "/etc/secrets/cookies.txt")
+
+OUTCOME_MESSAGES = {
+    NO_CAPTIONS: "This video has no captions.",
+    PRIVATE: "⚠️ This video is private and cannot be processed.",
+    AGE_RESTRICTED: "⚠️ This video is age-restricted and cannot be processed without signing in.",
+    UNAVAILABLE: "⚠️ This video is unavailable. It may have been removed or the link is wrong.",
+}
+
+# Exceptions from youtube_transcript_api that only mean "not right now"
+_TRANSIENT_ERRORS = (
+    "RequestBlocked", "IpBlocked", "YouTubeRequestFailed", "PoTokenRequired",
+    "FailedToCreateConsentCookie", "YouTubeDataUnparsable", "CookieError",
+)
+
+
+def cookies_configured():
+    return bool(os.getenv("YOUTUBE_COOKIES")) or any(os.path.exists(path) for path in COOKIE_FILES)
+
+
+def is_hard_failure(outcome):
+    """
+    True for outcomes that end processing. Age-restricted videos are only
+    final without cookies: the signed-in audio path can still fetch them.
+    """
+    if outcome == AGE_RESTRICTED and cookies_configured():
+        return False
+    return outcome in HARD_FAILURES
+
+
+def classify_message(message):
+    message = (message or "").lower()
+    if "not a bot" in message:
+        return TRANSIENT
+    if "confirm your age" in message or "age-restricted" in message or "age restricted" in message:
+        return AGE_RESTRICTED
+    if "private video" in message or "video is private" in message:
+        return PRIVATE
+    if ("video unavailable" in message or "no longer available" in message
+            or "has been removed" in message or "invalid video id" in message):
+        return UNAVAILABLE
+    if "subtitles are disabled" in message or "no subtitles" in message or "no captions" in message:
+        return NO_CAPTIONS
+    return TRANSIENT
+
+
+def classify_error(error):
+    name = type(error).__name__
+    if isinstance(error, TranscriptUnavailable):
+        return error.outcome
+    if name in _TRANSIENT_ERRORS:
+        return TRANSIENT
+    if name in ("TranscriptsDisabled", "NoTranscriptFound"):
+        return NO_CAPTIONS
+    if name == "AgeRestricted":
+        return AGE_RESTRICTED
+    if name in ("VideoUnavailable", "InvalidVideoId"):
+        return UNAVAILABLE
+    return classify_message(str(error))
+
+
+def classify_playability(status, reason=""):
+    if not status or status == "OK":
+        return None
+    outcome = classify_message(reason)
+    if outcome == TRANSIENT and status == "ERROR":
+        return UNAVAILABLE
+    return outcome
+
+
+class TranscriptUnavailable(Exception):
+    def __init__(self, outcome, message=None):
+        super().__init__(message or OUTCOME_MESSAGES.get(outcome, outcome))
+        self.outcome = outcome
+
+    @property
+    def is_hard_failure(self):
+        return is_hard_failure(self.outcome)
+
+
+class NegativeCache:
+    """
+    Remembers videos we already know cannot give us a transcript, so reruns
+    skip straight to the audio path (no captions) or fail immediately
+    (private, age-restricted, removed). Entries live next to the transcript
+    cache and are cleared by ``TranscriptCache.invalidate``.
+    """
+
+    @staticmethod
+    def ttl():
+        try:
+            return float(os.getenv("NEGATIVE_CACHE_TTL", "1800"))
+        except ValueError:
+            return 1800.0
+
+    @staticmethod
+    def _path(video_id):
+        return os.path.join(TranscriptCache.directory(), f"{video_id}.negative")
+
+    @staticmethod
+    def get(video_id):
+        if not TranscriptCache.enabled() or not video_id:
+            return None
+
+        path = NegativeCache._path(video_id)
+        entry = TranscriptCache._read_json(path)
+        if not entry:
+            return None
+        if time.time() - entry.get("created", 0) > NegativeCache.ttl():
+            TranscriptCache._remove(path)
+            return None
+        return entry.get("outcome")
+
+    @staticmethod
+    def put(video_id, outcome):
+        if not TranscriptCache.enabled() or not video_id or outcome == TRANSIENT:
+            return
+        if outcome == AGE_RESTRICTED and not is_hard_failure(outcome):
+            # With cookies the audio path may still work; do not make reruns give up early
+            return
+
+        try:
+            TranscriptCache._write_json(NegativeCache._path(video_id), {"outcome": outcome, "created": time.time()})
+        except OSError as e:
+            print(f"Negative cache write failed for {video_id}: {str(e)}")
+
+    @staticmethod
+    def clear(video_id):
+        TranscriptCache._remove(NegativeCache._path(video_id))
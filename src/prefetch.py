@@ -0,0 +1,151 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1").lower() in ("1", "true", "yes")
+# Speculative jobs of every session share this many threads per server process
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    """One background computation; sessions that want its result hold it open."""
+
+    def __init__(self, key, store=None):
+        self.key = key
+        self.store = store
+        self.future = None
+        self.sessions = set()
+        self._cancelled = threading.Event()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Called by the job between steps: stop early once nobody wants the result."""
+        if self._cancelled.is_set():
+            raise Cancelled(str(self.key))
+
+    def cancel(self):
+        self._cancelled.set()
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; its result, or None if it failed or was cancelled."""
+        try:
+            return self.future.result(timeout)
+        except (CancelledError, Exception):
+            # Failures are reported by the executor; the caller just does the work itself
+            return None
+
+
+class PrefetchExecutor:
+    """
+    Thread pool for speculative work started on behalf of browser sessions.
+
+    Jobs are keyed, so a second session asking for the same key attaches to
+    the running job instead of starting another. Each session holds the keys
+    it asked for; ``release`` drops a session's interest (e.g. it moved to
+    another video) and a job nobody holds any more is cancelled: a queued job
+    never starts and a running one stops at its next ``check()``. The pool
+    size is the global cap on concurrent speculative work.
+
+    Jobs given a ``store`` do not write their result themselves: the executor
+    puts it there once the job returns, under the same lock ``release`` takes,
+    so a job cancelled while it was still running never stores its answer.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or PREFETCH_WORKERS
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._sessions = {}
+        self._stats = {"submitted": 0, "attached": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def submit(self, session_id, key, fn, *args, store=None):
+        """
+        Run ``fn(job, *args)`` in the background for ``key`` unless it is already
+        running. A result other than None is put into ``store`` under ``key``.
+        """
+        with self._lock:
+            self._sessions.setdefault(session_id, set()).add(key)
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled():
+                job.sessions.add(session_id)
+                self._stats["attached"] += 1
+                return job
+
+            job = self._jobs[key] = Job(key, store)
+            job.sessions.add(session_id)
+            self._stats["submitted"] += 1
+            job.future = self._pool.submit(self._run, job, fn, args)
+        job.future.add_done_callback(lambda _: self._finished(job))
+        return job
+
+    @staticmethod
+    def _run(job, fn, args):
+        job.check()
+        return fn(job, *args)
+
+    def _finished(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            for session_id in job.sessions:
+                keys = self._sessions.get(session_id)
+                if keys is not None:
+                    keys.discard(job.key)
+                    if not keys:
+                        del self._sessions[session_id]
+
+            if job.future.cancelled() or job.cancelled():
+                self._stats["cancelled"] += 1
+            elif job.future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+                if job.store is not None and job.future.result() is not None:
+                    job.store.put(job.key, job.future.result())
+
+        if not job.future.cancelled() and not job.cancelled() and job.future.exception() is not None:
+            print(f"Prefetch failed for {job.key}: {str(job.future.exception())}")
+
+    def get(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+        return job if job is not None and not job.cancelled() else None
+
+    def release(self, session_id, keep=()):
+        """Drop ``session_id``'s interest in every job but ``keep``; cancel jobs left without sessions."""
+        orphaned = []
+        with self._lock:
+            keys = self._sessions.get(session_id, set())
+            for key in [k for k in keys if k not in keep]:
+                keys.discard(key)
+                job = self._jobs.get(key)
+                if job is None:
+                    continue
+                job.sessions.discard(session_id)
+                if not job.sessions:
+                    # Flagged under the lock, so _finished cannot store this job's result afterwards
+                    job._cancelled.set()
+                    orphaned.append(job)
+            if not keys:
+                self._sessions.pop(session_id, None)
+        for job in orphaned:
+            job.cancel()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = sum(1 for job in self._jobs.values() if job.future.running())
+            stats["queued"] = sum(1 for job in self._jobs.values() if not job.future.running() and not job.done())
+            stats["sessions"] = len(self._sessions)
+        return stats
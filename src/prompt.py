@@ -117,4 +117,46 @@ Special Directives:
         else:
             prompt_text = "Invalid prompt request"
 
-        return prompt_text
\ No newline at end of file
+        return prompt_text
+
+    @staticmethod
+    def structured_prompt(language="English"):
+        return f"""Video Digest Task
+
+Read the transcript and fill in every field of the JSON response:
+    1. summary: an engaging 250-350 word markdown summary with a short introduction,
+       the key points in logical order and the broader implications; bold key terms
+    2. chapters: the significant content transitions in order, each with the time it
+       starts in whole seconds from the beginning of the video and a concise one-line title;
+       the transcript marks times as "time:HH:MM:SS"
+    3. key_takeaways: 3-7 short, self-contained sentences a viewer should remember
+
+IMPORTANT: Write all text in {language}. If the transcript is in a different language, still write in {language}."""
+
+    @staticmethod
+    def chunk_prompt(index, total, start, end):
+        return f"""Partial Transcript Notes Task
+
+This is part {index} of {total} of a longer video, covering {start} to {end}.
+
+Guidelines:
+    1. Write dense notes on everything important said in this part
+    2. Keep names, numbers, definitions and conclusions
+    3. Start each note with the [HH:MM:SS] timestamp where the point is made
+    4. Do not add an introduction or a conclusion; other parts are summarized separately
+    5. Write the notes in the same language as the transcript"""
+
+    @staticmethod
+    def reduce_extra(total):
+        return f"""The full transcript was too long to send at once, so it was split into {total} consecutive parts.
+Below are timestamped notes for each part, in order. Treat them as the complete content of the video
+and keep their [HH:MM:SS] timestamps wherever timestamps are needed."""
+
+    @staticmethod
+    def audio_segment_extra(index, total, start, end, overlap=0):
+        text = f"""This audio is part {index} of {total} of a longer video, covering {start} to {end} of the full video.
+Write every timestamp relative to the start of this clip: [00:00:00] is the first moment of the clip."""
+        if overlap:
+            text += f"""
+The first {overlap} seconds repeat the end of the previous part; do not transcribe or summarize them again."""
+        return text
@@ -1,6 +1,6 @@
 import os
 import json
-import requests
+from src.http_client import HttpClient
 from urllib.parse import urlparse, parse_qs
 
 def is_render_env():
@@ -31,7 +31,7 @@ def get_transcript_alternative(video_id):
 def get_video_title_alternative(video_id):
     try:
         oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-        response = requests.get(oembed_url)
+        response = HttpClient.get(oembed_url, timeout=5)
         if response.status_code == 200:
             data = response.json()
             if "title" in data:
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from src.transcript_cache import TranscriptCache
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-youtube-video-summarizer", "responses")
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def request_key(*parts):
+    """Stable hash of a request payload; dict key order does not matter."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if time.time() - created > ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskBackend:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, ttl):
+        path = self._path(key)
+        entry = TranscriptCache._read_json(path)
+        if not entry:
+            return None
+        if time.time() - entry.get("created", 0) > ttl:
+            TranscriptCache._remove(path)
+            return None
+        try:
+            now = time.time()
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def put(self, key, value):
+        TranscriptCache._write_json(self._path(key), {"created": time.time(), "value": value})
+        return self._evict()
+
+    def _evict(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        evicted = 0
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            TranscriptCache._remove(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            TranscriptCache._remove(os.path.join(self.directory, name))
+
+
+class SQLiteBackend:
+    """Shared store for several worker processes on one host."""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, "
+                "accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, ttl):
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        with conn:
+            if time.time() - created > ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(value)
+
+    def put(self, key, value):
+        conn = self._connect()
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, now, now, len(payload.encode("utf-8"))),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = 0
+            while total > self.max_bytes:
+                row = conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 1").fetchone()
+                if row is None:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+                total -= row[1]
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for Gemini responses. The key is a hash of the full
+    request (model, prompt/contents, generation config), so identical requests
+    from reruns or other sessions are answered without calling the API.
+
+    Backend is picked with GEMINI_CACHE_BACKEND: memory (default), disk, sqlite
+    or none. Error strings are never cached.
+    """
+
+    _lock = threading.Lock()
+    _backend = None
+    _backend_name = None
+    _stats = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0, "bypassed": 0}
+
+    @staticmethod
+    def ttl():
+        return _env_float("GEMINI_CACHE_TTL", 24 * 3600)
+
+    @staticmethod
+    def bypassed():
+        return os.getenv("GEMINI_CACHE_BYPASS", "0").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def backend():
+        name = os.getenv("GEMINI_CACHE_BACKEND", "memory").lower()
+        if ResponseCache._backend_name == name:
+            return ResponseCache._backend
+
+        with ResponseCache._lock:
+            if ResponseCache._backend_name != name:
+                max_bytes = int(_env_float("GEMINI_CACHE_MAX_MB", 100) * 1024 * 1024)
+                directory = os.getenv("GEMINI_CACHE_DIR") or DEFAULT_CACHE_DIR
+                if name == "disk":
+                    backend = DiskBackend(directory, max_bytes)
+                elif name == "sqlite":
+                    backend = SQLiteBackend(os.path.join(directory, "responses.sqlite3"), max_bytes)
+                elif name == "none":
+                    backend = None
+                else:
+                    backend = MemoryBackend(int(_env_float("GEMINI_CACHE_MAX_ENTRIES", 512)))
+                ResponseCache._backend = backend
+                ResponseCache._backend_name = name
+        return ResponseCache._backend
+
+    @staticmethod
+    def _count(field, amount=1):
+        with ResponseCache._lock:
+            ResponseCache._stats[field] += amount
+
+    @staticmethod
+    def get(key, use_cache=True):
+        backend = ResponseCache.backend()
+        if backend is None:
+            return None
+        if not use_cache or ResponseCache.bypassed():
+            ResponseCache._count("bypassed")
+            return None
+
+        try:
+            value = backend.get(key, ResponseCache.ttl())
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Response cache read failed: {str(e)}")
+            value = None
+        ResponseCache._count("hits" if value is not None else "misses")
+        return value
+
+    @staticmethod
+    def put(key, value):
+        # Writes happen even when the read was skipped (use_cache=False), so a
+        # regenerated answer replaces the old one for every session
+        backend = ResponseCache.backend()
+        if backend is None or ResponseCache.bypassed():
+            return
+        if not value or (isinstance(value, str) and value.startswith("⚠️")):
+            return
+
+        try:
+            evicted = backend.put(key, value)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Response cache write failed: {str(e)}")
+            return
+        ResponseCache._count("puts")
+        ResponseCache._count("evictions", evicted)
+
+    @staticmethod
+    def clear():
+        backend = ResponseCache.backend()
+        if backend is not None:
+            backend.clear()
+
+    @staticmethod
+    def stats():
+        with ResponseCache._lock:
+            stats = dict(ResponseCache._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else None
+        stats["backend"] = ResponseCache._backend_name
+        return stats
@@ -0,0 +1,82 @@
+def format_hms(seconds):
+    timevar = round(float(seconds))
+    hours = int(timevar // 3600)
+    timevar %= 3600
+    minutes = int(timevar // 60)
+    timevar %= 60
+    return f"{hours:02d}:{minutes:02d}:{timevar:02d}"
+
+
+class TranscriptSegments:
+    """
+    One fetched caption track. All transcript views are rendered from the
+    same segment list so switching modes never has to go back to YouTube.
+    """
+
+    def __init__(self, segments, video_id=None, language=None, source=None):
+        self.segments = segments or []
+        self.video_id = video_id
+        self.language = language
+        self.source = source
+
+    def __bool__(self):
+        return bool(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def paragraphs(self, gap=2.0):
+        # Group segments into paragraphs based on time gaps
+        paragraphs = []
+        current_para = []
+        prev_end = 0
+
+        for s in self.segments:
+            start = float(s.get("start", 0))
+            text = s["text"].strip()
+            if not text:
+                continue
+
+            # If gap > 2 seconds, start a new paragraph
+            if current_para and (start - prev_end) > gap:
+                paragraphs.append(" ".join(current_para))
+                current_para = []
+
+            current_para.append(text)
+            # Estimate end time: start + rough duration per segment
+            prev_end = start + 3.0
+
+        if current_para:
+            paragraphs.append(" ".join(current_para))
+
+        return "\n\n".join(paragraphs)
+
+    def chunks(self, max_chars):
+        """Split into consecutive, time-aligned pieces whose timed() view stays under ``max_chars``."""
+        chunks = []
+        current = []
+        size = 0
+        for s in self.segments:
+            # Text plus the ' "time:HH:MM:SS" ' marker
+            length = len(s["text"]) + 18
+            if current and size + length > max_chars:
+                chunks.append(TranscriptSegments(current, self.video_id, self.language, self.source))
+                current = []
+                size = 0
+            current.append(s)
+            size += length
+        if current:
+            chunks.append(TranscriptSegments(current, self.video_id, self.language, self.source))
+        return chunks
+
+    def start(self):
+        return float(self.segments[0].get("start", 0)) if self.segments else 0.0
+
+    def end(self):
+        return float(self.segments[-1].get("start", 0)) if self.segments else 0.0
+
+    def timed(self):
+        final_transcript = ""
+        for s in self.segments:
+            final_transcript += f'{s["text"]} "time:{format_hms(s["start"])}" '
+        return final_transcript
@@ -0,0 +1,237 @@
+import os
+import copy
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_FLIGHT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-youtube-video-summarizer", "flights")
+
+# thread: coalesce within this process; file / sqlite: also across worker processes on one host
+SINGLE_FLIGHT_MODE = os.getenv("SINGLE_FLIGHT_MODE", "thread").lower()
+SINGLE_FLIGHT_DIR = os.getenv("SINGLE_FLIGHT_DIR") or DEFAULT_FLIGHT_DIR
+# A waiter gives up and does the work itself after this long; also the lease on a cross-process lock
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "600"))
+
+_POLL = 0.2
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Set when the leader stopped without an answer the others can use
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight work. The first caller for a key does the
+    work; callers that arrive while it runs wait for it and get the same
+    result (or a copy of its exception) instead of repeating it.
+
+    Keys are request hashes, so they cover the video, language, mode and the
+    exact prompt. With SINGLE_FLIGHT_MODE=file or sqlite the leader also holds
+    a host-wide lock, and a leader in another process waits for it; the work
+    it then runs is expected to find the other process's answer in a shared
+    cache (disk/sqlite response cache, transcript cache) before doing anything.
+    """
+
+    _lock = threading.Lock()
+    _calls = {}
+    _stats = {"leaders": 0, "coalesced": 0, "cross_process_waits": 0, "timeouts": 0}
+    _local = threading.local()
+
+    @staticmethod
+    def _count(field, amount=1):
+        with SingleFlight._lock:
+            SingleFlight._stats[field] += amount
+
+    @staticmethod
+    def stats():
+        with SingleFlight._lock:
+            stats = dict(SingleFlight._stats)
+            stats["in_flight"] = len(SingleFlight._calls)
+        stats["mode"] = SINGLE_FLIGHT_MODE
+        return stats
+
+    @staticmethod
+    def _join(key):
+        """Return ``(call, leader)`` for ``key``."""
+        with SingleFlight._lock:
+            call = SingleFlight._calls.get(key)
+            if call is not None:
+                SingleFlight._stats["coalesced"] += 1
+                return call, False
+            call = SingleFlight._calls[key] = _Call()
+            SingleFlight._stats["leaders"] += 1
+            return call, True
+
+    @staticmethod
+    def _finish(key, call):
+        with SingleFlight._lock:
+            if SingleFlight._calls.get(key) is call:
+                del SingleFlight._calls[key]
+        call.done.set()
+
+    @staticmethod
+    def _wait(call):
+        """True when ``call`` produced something to share; False means do the work yourself."""
+        if not call.done.wait(SINGLE_FLIGHT_TIMEOUT):
+            SingleFlight._count("timeouts")
+            return False
+        return not call.abandoned
+
+    @staticmethod
+    def do(key, fn):
+        """Return ``fn()``, run once for all concurrent callers with the same ``key``."""
+        call, leader = SingleFlight._join(key)
+        if not leader:
+            if SingleFlight._wait(call):
+                if call.error is not None:
+                    SingleFlight._raise_shared(call.error)
+                return call.result
+            return fn()
+
+        try:
+            with SingleFlight._process_lock(key):
+                call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            SingleFlight._finish(key, call)
+
+    @staticmethod
+    def _raise_shared(error):
+        """Raise the leader's exception in a waiter as its own instance, so threads never share one traceback."""
+        try:
+            own = copy.copy(error)
+        except Exception:
+            # Not reconstructible from its args; keep the message and the original as the cause
+            raise RuntimeError(f"Coalesced call failed: {str(error)}") from error
+        raise own from error
+
+    @staticmethod
+    def stream(key, fn):
+        """
+        Generator version of ``do`` for streamed text: the leader yields deltas
+        from ``fn()`` as they arrive; callers that joined meanwhile get the whole
+        text in one piece when it is finished.
+        """
+        call, leader = SingleFlight._join(key)
+        if not leader:
+            if SingleFlight._wait(call):
+                yield call.result
+            else:
+                yield from fn()
+            return
+
+        produced = []
+        completed = False
+        try:
+            with SingleFlight._process_lock(key):
+                for delta in fn():
+                    produced.append(delta)
+                    yield delta
+            completed = True
+        finally:
+            # A consumer that stops reading early leaves nothing worth sharing
+            call.result = "".join(produced)
+            call.abandoned = not completed or not produced
+            SingleFlight._finish(key, call)
+
+    @staticmethod
+    @contextmanager
+    def _process_lock(key):
+        if SINGLE_FLIGHT_MODE == "file" and fcntl is not None:
+            with SingleFlight._file_lock(key):
+                yield
+        elif SINGLE_FLIGHT_MODE == "sqlite":
+            with SingleFlight._sqlite_lock(key):
+                yield
+        else:
+            yield
+
+    @staticmethod
+    @contextmanager
+    def _file_lock(key):
+        os.makedirs(SINGLE_FLIGHT_DIR, exist_ok=True)
+        fd = os.open(os.path.join(SINGLE_FLIGHT_DIR, f"{key}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                SingleFlight._count("cross_process_waits")
+                deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            # The other process is stuck; go ahead without the lock
+                            SingleFlight._count("timeouts")
+                            break
+                        time.sleep(_POLL)
+            yield
+        finally:
+            # Closing the descriptor releases the lock; the file stays so waiters never race an unlink
+            os.close(fd)
+
+    @staticmethod
+    def _connect():
+        conn = getattr(SingleFlight._local, "conn", None)
+        if conn is None:
+            os.makedirs(SINGLE_FLIGHT_DIR, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(SINGLE_FLIGHT_DIR, "flights.sqlite3"), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            SingleFlight._local.conn = conn
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def _sqlite_lock(key):
+        conn = SingleFlight._connect()
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT
+        waited = False
+        while True:
+            with conn:
+                # A lease past its expiry belongs to a process that died mid-flight
+                conn.execute("DELETE FROM flights WHERE key = ? AND expires < ?", (key, time.time()))
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO flights (key, owner, expires) VALUES (?, ?, ?)",
+                    (key, owner, time.time() + SINGLE_FLIGHT_TIMEOUT),
+                ).rowcount
+            if inserted:
+                break
+            if not waited:
+                SingleFlight._count("cross_process_waits")
+                waited = True
+            if time.monotonic() >= deadline:
+                SingleFlight._count("timeouts")
+                owner = None
+                break
+            time.sleep(_POLL)
+
+        try:
+            yield
+        finally:
+            if owner is not None:
+                with conn:
+                    conn.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, owner))
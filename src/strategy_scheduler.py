@@ -0,0 +1,128 @@
+import os
+import time
+import threading
+from collections import deque
+
+STRATEGY_WINDOW = int(os.getenv("STRATEGY_WINDOW", "50"))
+STRATEGY_FAILURE_THRESHOLD = int(os.getenv("STRATEGY_FAILURE_THRESHOLD", "5"))
+STRATEGY_COOLDOWN = float(os.getenv("STRATEGY_COOLDOWN", "300"))
+
+# Latency assumed for a strategy we have never timed
+PRIOR_LATENCY = 1.0
+
+
+class StrategyScheduler:
+    """
+    Orders interchangeable strategies by expected time-to-success and trips a
+    circuit breaker on strategies that keep failing.
+
+    Each strategy keeps a rolling window of (ok, latency) outcomes. Strategies
+    are ranked by mean latency divided by their (Laplace-smoothed) success
+    rate, which is the optimal order for trying independent alternatives one
+    after another. After ``failure_threshold`` consecutive failures a strategy
+    is skipped for ``cooldown`` seconds, then let through once (half-open); a
+    success closes the breaker again, a failure re-opens it. The half-open
+    probe is taken by ``admit`` when the strategy actually starts, so a caller
+    that ranked it but never ran it does not hold the breaker open.
+
+    Callers record ``ok=False`` only for transport or HTTP errors: a strategy
+    that reached its source and learned there is nothing to return is healthy.
+    """
+
+    def __init__(self, name, window=None, failure_threshold=None, cooldown=None):
+        self.name = name
+        self.window = window or STRATEGY_WINDOW
+        self.failure_threshold = failure_threshold or STRATEGY_FAILURE_THRESHOLD
+        self.cooldown = STRATEGY_COOLDOWN if cooldown is None else cooldown
+        self._lock = threading.Lock()
+        self._outcomes = {}
+        self._consecutive_failures = {}
+        self._open_until = {}
+        self._probing = set()
+
+    def _state(self, strategy, now):
+        open_until = self._open_until.get(strategy)
+        if open_until is None:
+            return "closed"
+        return "open" if now < open_until else "half_open"
+
+    def _expected_cost(self, strategy):
+        outcomes = self._outcomes.get(strategy)
+        if not outcomes:
+            return PRIOR_LATENCY / 0.5
+        successes = sum(1 for ok, _ in outcomes if ok)
+        success_rate = (successes + 1) / (len(outcomes) + 2)
+        mean_latency = sum(latency for _, latency in outcomes) / len(outcomes)
+        return mean_latency / success_rate
+
+    def order(self, strategies):
+        """Return the strategy names worth trying now, best first. Open circuits are left out."""
+        now = time.monotonic()
+        with self._lock:
+            available = [s for s in strategies if self._state(s, now) != "open" and s not in self._probing]
+            if not available and strategies:
+                # Everything is tripped; probe the one that recovers first rather than failing outright
+                available = [min(strategies, key=lambda s: self._open_until.get(s, 0))]
+            position = {s: i for i, s in enumerate(strategies)}
+            return sorted(available, key=lambda s: (self._expected_cost(s), position[s]))
+
+    def admit(self, strategy):
+        """
+        Called as ``strategy`` starts. False when it is half-open and another
+        caller's probe is already running; the caller should skip it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if strategy in self._probing:
+                return False
+            if self._state(strategy, now) == "half_open":
+                # Everyone else sees the breaker open until this probe reports back
+                self._probing.add(strategy)
+            return True
+
+    def record(self, strategy, ok, latency):
+        now = time.monotonic()
+        with self._lock:
+            self._probing.discard(strategy)
+            self._outcomes.setdefault(strategy, deque(maxlen=self.window)).append((bool(ok), float(latency)))
+            if ok:
+                self._consecutive_failures[strategy] = 0
+                self._open_until.pop(strategy, None)
+                return
+
+            failures = self._consecutive_failures.get(strategy, 0) + 1
+            self._consecutive_failures[strategy] = failures
+            if self._state(strategy, now) == "half_open" or failures >= self.failure_threshold:
+                self._open_until[strategy] = now + self.cooldown
+
+    def reset(self, strategy=None):
+        with self._lock:
+            for table in (self._outcomes, self._consecutive_failures, self._open_until):
+                if strategy is None:
+                    table.clear()
+                else:
+                    table.pop(strategy, None)
+            if strategy is None:
+                self._probing.clear()
+            else:
+                self._probing.discard(strategy)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            snapshot = {}
+            for strategy in set(self._outcomes) | set(self._open_until):
+                outcomes = self._outcomes.get(strategy, ())
+                successes = [latency for ok, latency in outcomes if ok]
+                snapshot[strategy] = {
+                    "attempts": len(outcomes),
+                    "successes": len(successes),
+                    "success_rate": len(successes) / len(outcomes) if outcomes else None,
+                    "mean_latency": sum(l for _, l in outcomes) / len(outcomes) if outcomes else None,
+                    "mean_success_latency": sum(successes) / len(successes) if successes else None,
+                    "expected_cost": self._expected_cost(strategy),
+                    "consecutive_failures": self._consecutive_failures.get(strategy, 0),
+                    "state": self._state(strategy, now),
+                    "open_for": max(0.0, self._open_until[strategy] - now) if strategy in self._open_until else 0.0,
+                }
+            return snapshot
@@ -14,6 +14,13 @@ except ImportError:
         text = re.sub(r'^#+\s+(.+)$', r'\1', text, flags=re.MULTILINE)
         return text
 
+_TIMESTAMP = r'\d{1,2}:\d{2}(?::\d{2})?(?![\d:])'
+# A timestamp at the start of a line, after any list marker, bold or bracket, optionally a range
+_LINE_TIMESTAMP = re.compile(
+    rf'^(\s*(?:[-*•]\s+|\d+[.)]\s+)?[\[(*]*)({_TIMESTAMP})(?:([\])*]*\s*[-–]\s*[\[(*]*)({_TIMESTAMP}))?',
+    re.MULTILINE,
+)
+
 class TimestampFormatter:
     @staticmethod
     def validate_timestamp(timestamp):
@@ -77,6 +84,49 @@ class TimestampFormatter:
 
         return '\n'.join(formatted_lines)
 
+    @staticmethod
+    def format_chapters(chapters, max_description_length=100):
+        # Same output as format(), built from structured chapters instead of parsed text
+        if not chapters:
+            return "No timestamps available"
+
+        formatted_lines = []
+        for chapter in chapters:
+            minutes, seconds = divmod(int(chapter["start_seconds"]), 60)
+            hours, minutes = divmod(minutes, 60)
+            description = chapter["title"]
+            if len(description) > max_description_length:
+                description = description[:max_description_length] + '...'
+            formatted_lines.append(f"{hours:02d}:{minutes:02d}:{seconds:02d} - {description}")
+
+        return '\n'.join(formatted_lines)
+
+    @staticmethod
+    def shift(text, offset_seconds):
+        """
+        Move the timestamp that starts each line of ``text`` (and the end of a
+        "start - end" range) forward by ``offset_seconds``. Times inside the
+        descriptions, e.g. "meeting at 10:30", are left alone.
+        """
+        if not text or not offset_seconds:
+            return text
+
+        def shift_timestamp(timestamp):
+            parts = [int(p) for p in timestamp.split(':')]
+            seconds = parts[-1] + parts[-2] * 60 + (parts[-3] * 3600 if len(parts) == 3 else 0)
+            minutes, seconds = divmod(seconds + int(round(offset_seconds)), 60)
+            hours, minutes = divmod(minutes, 60)
+            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+        def shift_match(match):
+            lead, start, separator, end = match.groups()
+            shifted = lead + shift_timestamp(start)
+            if end:
+                shifted += separator + shift_timestamp(end)
+            return shifted
+
+        return _LINE_TIMESTAMP.sub(shift_match, text)
+
     @staticmethod
     def hyperlink_timestamps(formatted_timestamps, video_url):
         def create_youtube_timestamp_link(match):
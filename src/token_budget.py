@@ -0,0 +1,230 @@
+import os
+import re
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Input tokens we are willing to send in one request, whatever the context window allows
+GEMINI_INPUT_TOKEN_BUDGET = int(os.getenv("GEMINI_INPUT_TOKEN_BUDGET", "120000"))
+# Size of one map-reduce chunk when a transcript does not fit the budget
+GEMINI_MAP_CHUNK_TOKENS = int(os.getenv("GEMINI_MAP_CHUNK_TOKENS", "32000"))
+# Re-check the estimator against countTokens after this many estimates
+GEMINI_TOKEN_CALIBRATE_EVERY = int(os.getenv("GEMINI_TOKEN_CALIBRATE_EVERY", "25"))
+GEMINI_TOKEN_CALIBRATION_CHARS = int(os.getenv("GEMINI_TOKEN_CALIBRATION_CHARS", "12000"))
+
+CONTEXT_WINDOWS = {
+    "gemini-2.5-flash": 1048576,
+    "gemini-2.5-pro": 1048576,
+    "gemini-2.0-flash": 1048576,
+}
+DEFAULT_CONTEXT_WINDOW = 32768
+
+FULL = "full"
+COMPACTED = "compacted"
+MAP_REDUCE = "map_reduce"
+
+# (first code point, script) for the scripts that tokenize noticeably differently
+_SCRIPT_STARTS = [
+    (0x0000, "latin"), (0x0250, "other"), (0x0370, "greek"), (0x0400, "cyrillic"),
+    (0x0530, "other"), (0x0590, "arabic"), (0x0780, "other"), (0x0900, "indic"),
+    (0x0E00, "thai"), (0x0E80, "other"), (0x1100, "hangul"), (0x1200, "other"),
+    (0x1E00, "latin"), (0x2000, "other"), (0x3000, "cjk"), (0xA000, "other"),
+    (0xAC00, "hangul"), (0xD7B0, "other"), (0xF900, "cjk"), (0xFB00, "other"),
+    (0xFF00, "cjk"), (0xFFF0, "other"),
+]
+_STARTS = [start for start, _ in _SCRIPT_STARTS]
+
+# Rough characters per token for Gemini's tokenizer, corrected at runtime by calibration
+CHARS_PER_TOKEN = {
+    "latin": 4.0,
+    "greek": 2.5,
+    "cyrillic": 3.0,
+    "arabic": 2.5,
+    "indic": 2.5,
+    "thai": 2.5,
+    "hangul": 1.5,
+    "cjk": 1.2,
+    "other": 3.0,
+}
+
+# Classify at most this many characters; longer texts are sampled evenly
+_SAMPLE_CHARS = 4000
+
+_NOISE = re.compile(r"\[(?:music|applause|laughter|laughs|inaudible|silence|noise|__)\]|♪+", re.IGNORECASE)
+# English fillers only: "um", "erm" and friends are real words in other languages (Portuguese "um")
+_FILLERS = re.compile(r"\b(?:um+|uh+|erm+|hmm+|uh-huh)\b,?\s*", re.IGNORECASE)
+_TIME_MARKER = re.compile(r' ?"time:(\d{2}):(\d{2}):(\d{2})" ?')
+_SPACES = re.compile(r"[ \t]+")
+
+
+def _script_of(char):
+    return _SCRIPT_STARTS[bisect.bisect_right(_STARTS, ord(char)) - 1][1]
+
+
+def script_mix(text):
+    """Share of each script in ``text``, from an evenly spaced sample."""
+    if not text:
+        return {}
+    step = max(1, len(text) // _SAMPLE_CHARS)
+    counts = {}
+    sampled = 0
+    for char in text[::step]:
+        script = _script_of(char)
+        counts[script] = counts.get(script, 0) + 1
+        sampled += 1
+    return {script: count / sampled for script, count in counts.items()}
+
+
+def _is_english(language):
+    return bool(language) and re.split(r"[-_]", language.lower())[0] in ("en", "english")
+
+
+def compact_text(text, marker_gap=30, language=None):
+    """
+    Shrink a transcript without losing content: drop non-speech cues (and filler
+    words when ``language`` is English), keep a time marker only every
+    ``marker_gap`` seconds, squeeze spaces.
+    """
+    text = _NOISE.sub("", text)
+    if _is_english(language):
+        text = _FILLERS.sub("", text)
+
+    last_kept = [None]
+
+    def thin(match):
+        seconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3))
+        if last_kept[0] is not None and seconds - last_kept[0] < marker_gap:
+            return " "
+        last_kept[0] = seconds
+        return match.group(0)
+
+    text = _TIME_MARKER.sub(thin, text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class TokenBudget:
+    """
+    Decides how a transcript is sent to Gemini from an estimated token count
+    rather than a character count.
+
+    Estimates come from a script-aware chars-per-token table (Latin text packs
+    about four characters into a token, CJK about one). Every
+    GEMINI_TOKEN_CALIBRATE_EVERY estimates, and the first time a script is
+    seen, a sample is handed out for the caller to measure with countTokens;
+    the measured ratio corrects that script's rate. Every plan and calibration
+    is logged on the ``src.token_budget`` logger (plans that send the full text
+    at DEBUG, the rest at INFO).
+    """
+
+    _lock = threading.Lock()
+    _factors = {}
+    _since_calibration = 0
+    _calibrating = False
+
+    @staticmethod
+    def _raw_estimate(text, mix):
+        chars_per_token = sum(share * CHARS_PER_TOKEN[script] for script, share in mix.items())
+        return len(text) / chars_per_token if chars_per_token else 0.0
+
+    @staticmethod
+    def estimate(text, mix=None):
+        if not text:
+            return 0
+        mix = mix or script_mix(text)
+        with TokenBudget._lock:
+            TokenBudget._since_calibration += 1
+            factor = sum(share * TokenBudget._factors.get(script, 1.0) for script, share in mix.items())
+        return max(1, int(TokenBudget._raw_estimate(text, mix) * factor))
+
+    @staticmethod
+    def calibration_sample(text):
+        """Return a slice of ``text`` worth measuring with countTokens, or None if not due."""
+        if not text or len(text) < 200:
+            return None
+        mix = script_mix(text)
+        dominant = max(mix, key=mix.get)
+        with TokenBudget._lock:
+            due = dominant not in TokenBudget._factors or TokenBudget._since_calibration >= GEMINI_TOKEN_CALIBRATE_EVERY
+            if not due or TokenBudget._calibrating:
+                return None
+            TokenBudget._calibrating = True
+        middle = max(0, len(text) // 2 - GEMINI_TOKEN_CALIBRATION_CHARS // 2)
+        return text[middle:middle + GEMINI_TOKEN_CALIBRATION_CHARS]
+
+    @staticmethod
+    def record_count(sample, counted):
+        """Fold a countTokens result for ``sample`` into the dominant script's correction factor."""
+        mix = script_mix(sample)
+        dominant = max(mix, key=mix.get)
+        raw = TokenBudget._raw_estimate(sample, mix)
+        with TokenBudget._lock:
+            TokenBudget._calibrating = False
+            if not counted or not raw:
+                return
+            TokenBudget._since_calibration = 0
+            measured = counted / raw
+            previous = TokenBudget._factors.get(dominant)
+            factor = measured if previous is None else 0.5 * previous + 0.5 * measured
+            TokenBudget._factors[dominant] = factor
+        logger.info(
+            "token calibration: script=%s sample_chars=%d estimated=%d counted=%d factor=%.3f",
+            dominant, len(sample), int(raw), counted, factor,
+        )
+
+    @staticmethod
+    def calibration_failed():
+        with TokenBudget._lock:
+            TokenBudget._calibrating = False
+
+    @staticmethod
+    def input_budget(model, max_output_tokens=0):
+        window = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        return min(GEMINI_INPUT_TOKEN_BUDGET, window - max_output_tokens)
+
+    @staticmethod
+    def chunk_chars(text, tokens=None, chunk_tokens=None):
+        """Characters of ``text`` that make up about ``chunk_tokens`` tokens."""
+        tokens = tokens or TokenBudget.estimate(text)
+        return max(1, int((chunk_tokens or GEMINI_MAP_CHUNK_TOKENS) * len(text) / max(1, tokens)))
+
+    @staticmethod
+    def plan(text, model, overhead_tokens=0, max_output_tokens=0, language=None):
+        """
+        Pick how to send ``text``: ``full`` if it fits the budget, ``compacted`` if
+        compact_text() makes it fit, otherwise ``map_reduce``. ``language`` is the
+        transcript's language code, used by compact_text(). Returns a dict with
+        the strategy, the text to send (None for map_reduce), the estimates and,
+        for map_reduce, the chunk size in characters.
+        """
+        budget = TokenBudget.input_budget(model, max_output_tokens) - overhead_tokens
+        mix = script_mix(text)
+        tokens = TokenBudget.estimate(text, mix)
+        plan = {
+            "strategy": FULL,
+            "text": text,
+            "tokens": tokens,
+            "budget": budget,
+            "chunk_chars": None,
+            "script": max(mix, key=mix.get) if mix else None,
+        }
+
+        if tokens > budget:
+            compacted = compact_text(text, language=language)
+            compacted_tokens = TokenBudget.estimate(compacted, mix)
+            if compacted_tokens <= budget:
+                plan.update(strategy=COMPACTED, text=compacted, tokens=compacted_tokens)
+            else:
+                plan.update(
+                    strategy=MAP_REDUCE,
+                    text=None,
+                    chunk_chars=TokenBudget.chunk_chars(text, tokens, min(GEMINI_MAP_CHUNK_TOKENS, budget)),
+                )
+
+        logger.log(
+            logging.DEBUG if plan["strategy"] == FULL else logging.INFO,
+            "token plan: model=%s chars=%d script=%s estimated=%d budget=%d strategy=%s sent=%d",
+            model, len(text), plan["script"], tokens, budget, plan["strategy"], plan["tokens"],
+        )
+        return plan
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-youtube-video-summarizer", "transcripts")
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class TranscriptCache:
+    """
+    Persistent on-disk transcript cache.
+
+    Entries are keyed by (video_id, resolved language, source strategy). A small
+    alias file maps the requested language ("auto", "hi", ...) to the entry that
+    actually answered it, so a Hindi request that resolved to English hits too.
+    Files are evicted least-recently-used once the directory exceeds its size cap.
+    """
+
+    @staticmethod
+    def enabled():
+        return os.getenv("TRANSCRIPT_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+    @staticmethod
+    def directory():
+        path = os.getenv("TRANSCRIPT_CACHE_DIR") or DEFAULT_CACHE_DIR
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def ttl():
+        return _env_float("TRANSCRIPT_CACHE_TTL", 7 * 24 * 3600)
+
+    @staticmethod
+    def max_bytes():
+        return int(_env_float("TRANSCRIPT_CACHE_MAX_MB", 200) * 1024 * 1024)
+
+    @staticmethod
+    def _digest(*parts):
+        return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_path(video_id, language, source):
+        name = f"{video_id}.{TranscriptCache._digest(video_id, language, source)[:16]}.json"
+        return os.path.join(TranscriptCache.directory(), name)
+
+    @staticmethod
+    def _alias_path(video_id, requested_lang):
+        name = f"{video_id}.req-{TranscriptCache._digest(video_id, requested_lang or 'auto')[:16]}.alias"
+        return os.path.join(TranscriptCache.directory(), name)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, "r", encoding="utf-8") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(data, fp, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def get(video_id, requested_lang=None):
+        """Return (segments, language, source) for a previous lookup, or None."""
+        if not TranscriptCache.enabled() or not video_id:
+            return None
+
+        try:
+            alias_path = TranscriptCache._alias_path(video_id, requested_lang)
+            alias = TranscriptCache._read_json(alias_path)
+            if not alias:
+                return None
+
+            entry_path = TranscriptCache._entry_path(video_id, alias.get("language"), alias.get("source"))
+            entry = TranscriptCache._read_json(entry_path)
+            if not entry or not entry.get("segments"):
+                TranscriptCache._remove(alias_path)
+                return None
+
+            if time.time() - entry.get("created", 0) > TranscriptCache.ttl():
+                TranscriptCache._remove(entry_path)
+                TranscriptCache._remove(alias_path)
+                return None
+
+            # Touch both files so eviction sees them as recently used
+            now = time.time()
+            os.utime(entry_path, (now, now))
+            os.utime(alias_path, (now, now))
+            return entry["segments"], entry.get("language"), entry.get("source")
+        except OSError:
+            return None
+
+    @staticmethod
+    def put(video_id, requested_lang, segments, language, source):
+        if not TranscriptCache.enabled() or not video_id or not segments:
+            return
+
+        try:
+            TranscriptCache._write_json(
+                TranscriptCache._entry_path(video_id, language, source),
+                {
+                    "video_id": video_id,
+                    "language": language,
+                    "source": source,
+                    "created": time.time(),
+                    "segments": segments,
+                },
+            )
+            TranscriptCache._write_json(
+                TranscriptCache._alias_path(video_id, requested_lang),
+                {"language": language, "source": source},
+            )
+            TranscriptCache.evict()
+        except OSError as e:
+            print(f"Transcript cache write failed for {video_id}: {str(e)}")
+
+    @staticmethod
+    def invalidate(video_id):
+        if not video_id:
+            return
+        try:
+            directory = TranscriptCache.directory()
+            for name in os.listdir(directory):
+                if name.startswith(f"{video_id}."):
+                    TranscriptCache._remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+    @staticmethod
+    def evict():
+        directory = TranscriptCache.directory()
+        limit = TranscriptCache.max_bytes()
+
+        files = []
+        total = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= limit:
+            return
+
+        files.sort()
+        for _, size, path in files:
+            if total <= limit:
+                break
+            TranscriptCache._remove(path)
+            total -= size
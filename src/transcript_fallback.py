@@ -1,22 +1,33 @@
-import requests
+from src.http_client import HttpClient
 import json
 import time
 import os
 from urllib.parse import quote
+from src.strategy_scheduler import StrategyScheduler
+
+INVIDIOUS_INSTANCES = [
+    "https://invidious.snopyta.org",
+    "https://yewtu.be",
+    "https://invidious.kavin.rocks"
+]
+
+# Dead instances get tripped open instead of costing a timeout on every call
+INVIDIOUS_SCHEDULER = StrategyScheduler("invidious")
 
 class TranscriptFallback:
     @staticmethod
-    def get_transcript(video_id):
-        invidious_instances = [
-            "https://invidious.snopyta.org",
-            "https://yewtu.be",
-            "https://invidious.kavin.rocks"
-        ]
+    def instance_stats():
+        return INVIDIOUS_SCHEDULER.stats()
 
-        for instance in invidious_instances:
+    @staticmethod
+    def get_transcript(video_id):
+        for instance in INVIDIOUS_SCHEDULER.order(INVIDIOUS_INSTANCES):
+            started = time.monotonic()
+            healthy = False
             try:
                 captions_url = f"{instance}/api/v1/captions/{video_id}"
-                response = requests.get(captions_url, timeout=5)
+                response = HttpClient.get(captions_url, timeout=5)
+                healthy = response.status_code in (200, 404)
 
                 if response.status_code == 200:
                     captions_data = response.json()
@@ -32,7 +43,7 @@ class TranscriptFallback:
 
                     if english_caption:
                         caption_url = f"{instance}/api/v1/captions/{video_id}?label={quote(english_caption.get('label', ''))}"
-                        caption_response = requests.get(caption_url, timeout=5)
+                        caption_response = HttpClient.get(caption_url, timeout=5)
                         if caption_response.status_code == 200:
                             try:
                                 text_content = " ".join([item.get("text", "") for item in caption_response.json()])
@@ -43,12 +54,14 @@ class TranscriptFallback:
             except Exception as e:
                 print(f"Invidious fallback failed for {instance}: {str(e)}")
                 continue
+            finally:
+                INVIDIOUS_SCHEDULER.record(instance, healthy, time.monotonic() - started)
 
         youtube_api_key = os.getenv("YOUTUBE_API_KEY")
         if youtube_api_key:
             try:
                 api_url = f"https://www.googleapis.com/youtube/v3/captions?videoId={video_id}&part=snippet&key={youtube_api_key}"
-                response = requests.get(api_url)
+                response = HttpClient.get(api_url)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -1,10 +1,21 @@
 from youtube_transcript_api import YouTubeTranscriptApi
-from bs4 import BeautifulSoup
-import requests
 import re
-import json
 import html
+import os
+import time
+import functools
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.http_client import HttpClient
+from src.transcript_cache import TranscriptCache
+from src.video_probe import VideoProbe, WATCH_HEADERS
+from src.strategy_scheduler import StrategyScheduler
+from src.negative_cache import (
+    NegativeCache, TranscriptUnavailable, classify_error, NO_CAPTIONS, TRANSIENT,
+)
+from src.segments import TranscriptSegments
+from src.response_cache import request_key
+from src.single_flight import SingleFlight
 
 LANGUAGE_PRIORITIES = [
     'en', 'en-US', 'en-GB', 'en-IN',
@@ -15,6 +26,18 @@ LANGUAGE_PRIORITIES = [
     'lt', 'lv', 'et', 'sw', 'fil', 'ne', 'si', 'my', 'km', 'lo', 'ka', 'am',
 ]
 
+# How the transcript strategies are scheduled:
+#   sequential - try each strategy only after the previous one failed
+#   hedged     - start the next strategy if the current one has not answered within the hedge delay
+#   parallel   - start all strategies at once (up to the concurrency limit)
+TRANSCRIPT_FETCH_MODE = os.getenv("TRANSCRIPT_FETCH_MODE", "hedged")
+TRANSCRIPT_HEDGE_DELAY = float(os.getenv("TRANSCRIPT_HEDGE_DELAY", "2.0"))
+TRANSCRIPT_TIME_BUDGET = float(os.getenv("TRANSCRIPT_TIME_BUDGET", "60"))
+TRANSCRIPT_MAX_CONCURRENCY = int(os.getenv("TRANSCRIPT_MAX_CONCURRENCY", "3"))
+
+# Learns which strategies work from this host and in what order to try them
+TRANSCRIPT_SCHEDULER = StrategyScheduler("transcript")
+
 class GetVideo:
     @staticmethod
     def Id(link):
@@ -44,13 +67,17 @@ class GetVideo:
         if not video_id:
             return None
 
+        probe = VideoProbe.get(video_id)
+        if probe and probe.get("title"):
+            return probe["title"]
+
         try:
             oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
 
-            response = requests.get(oembed_url, headers=headers, timeout=5)
+            response = HttpClient.get(oembed_url, headers=headers, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 if "title" in data:
@@ -59,27 +86,6 @@ class GetVideo:
         except Exception:
             pass
 
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            }
-
-            response = requests.get(f"https://www.youtube.com/watch?v={video_id}", headers=headers)
-
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, "html.parser")
-
-                for meta in soup.find_all("meta"):
-                    if meta.get("property") == "og:title" and meta.get("content"):
-                        return meta["content"]
-
-                if soup.title:
-                    title_text = soup.title.string
-                    if title_text and " - YouTube" in title_text:
-                        return title_text.split(" - YouTube")[0].strip()
-        except Exception:
-            pass
-
         return f"YouTube Video ({video_id})"
 
     @staticmethod
@@ -94,92 +100,74 @@ class GetVideo:
                 langs.append(lang)
         return langs
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _lang_rank_index(preferred_lang=None):
+        return {lang: rank for rank, lang in enumerate(GetVideo._build_lang_list(preferred_lang))}
+
+    @staticmethod
+    def _rank_tracks(tracks, preferred_lang, lang_of, is_generated):
+        # The requested language wins outright; otherwise manual tracks beat ASR ones, then language priority.
+        # Unknown languages keep their original order at the end.
+        index = GetVideo._lang_rank_index(preferred_lang)
+        unranked = len(index)
+        preferred = set()
+        if preferred_lang and preferred_lang != "auto":
+            preferred = set(GetVideo._build_lang_list(preferred_lang)[:4])
+        return sorted(tracks, key=lambda t: (
+            lang_of(t) not in preferred,
+            bool(is_generated(t)),
+            index.get(lang_of(t), unranked),
+        ))
+
     @staticmethod
     def _transcript_via_api(video_id, preferred_lang=None):
-        ytt_api = YouTubeTranscriptApi()
-        langs = GetVideo._build_lang_list(preferred_lang)
+        ytt_api = YouTubeTranscriptApi(http_client=HttpClient.session("youtube_transcript_api"))
 
         try:
-            for lang in langs:
-                try:
-                    fetched = ytt_api.fetch(video_id, languages=[lang])
-                    return [{"text": snippet.text, "start": snippet.start} for snippet in fetched]
-                except Exception:
-                    continue
-
-            fetched = ytt_api.fetch(video_id)
-            return [{"text": snippet.text, "start": snippet.start} for snippet in fetched]
-        except Exception:
+            transcript_list = list(ytt_api.list(video_id))
+        except Exception as e:
+            # TRANSIENT included: the scheduler counts it against this strategy's health
+            raise TranscriptUnavailable(classify_error(e)) from e
+
+        ranked = GetVideo._rank_tracks(
+            transcript_list, preferred_lang,
+            lambda t: t.language_code,
+            lambda t: t.is_generated,
+        )
+        error = None
+        for transcript in ranked:
             try:
-                transcript_list = ytt_api.list(video_id)
-                for transcript in transcript_list:
-                    try:
-                        fetched = transcript.fetch()
-                        return [{"text": snippet.text, "start": snippet.start} for snippet in fetched]
-                    except Exception:
-                        continue
-            except Exception:
-                return None
+                fetched = transcript.fetch()
+                return [{"text": snippet.text, "start": snippet.start} for snippet in fetched], transcript.language_code
+            except Exception as e:
+                error = e
+                continue
+        if error is not None:
+            raise TranscriptUnavailable(TRANSIENT) from error
         return None
 
     @staticmethod
     def _transcript_via_page_scrape(video_id, preferred_lang=None):
         try:
-            session = requests.Session()
-            session.headers.update({
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-            })
-
-            url = f"https://www.youtube.com/watch?v={video_id}"
-            resp = session.get(url, timeout=15)
-
-            if resp.status_code != 200:
-                return None
-
-            player_match = re.search(r'ytInitialPlayerResponse\s*=\s*(\{.+?\})\s*;', resp.text)
-            if not player_match:
-                return None
-
-            player_data = json.loads(player_match.group(1))
-            captions = player_data.get("captions", {})
-            renderer = captions.get("playerCaptionsTracklistRenderer", {})
-            tracks = renderer.get("captionTracks", [])
-
+            tracks = VideoProbe.caption_tracks(video_id)
             if not tracks:
-                return None
-
-            langs = GetVideo._build_lang_list(preferred_lang)
-
-            chosen_track = None
-            for lang in langs:
-                for track in tracks:
-                    if track.get("languageCode") == lang and track.get("kind") != "asr":
-                        chosen_track = track
-                        break
-                if chosen_track:
-                    break
+                # The watch page could not be fetched or parsed
+                raise TranscriptUnavailable(TRANSIENT)
 
-            if not chosen_track:
-                for lang in langs:
-                    for track in tracks:
-                        if track.get("languageCode") == lang:
-                            chosen_track = track
-                            break
-                    if chosen_track:
-                        break
-
-            if not chosen_track:
-                chosen_track = tracks[0]
+            chosen_track = GetVideo._rank_tracks(
+                tracks, preferred_lang,
+                lambda t: t.get("languageCode"),
+                lambda t: t.get("kind") == "asr",
+            )[0]
 
             base_url = chosen_track.get("baseUrl", "")
             if not base_url:
                 return None
 
-            cap_resp = session.get(base_url, timeout=15)
+            cap_resp = HttpClient.get(base_url, headers=WATCH_HEADERS, timeout=15)
             if cap_resp.status_code != 200:
-                return None
+                raise TranscriptUnavailable(TRANSIENT, f"Caption download failed (HTTP {cap_resp.status_code})")
 
             root = ET.fromstring(cap_resp.text)
             segments = []
@@ -190,128 +178,217 @@ class GetVideo:
                 if t:
                     segments.append({"text": t, "start": start})
 
-            return segments if segments else None
+            return (segments, chosen_track.get("languageCode")) if segments else None
 
-        except Exception:
-            return None
+        except TranscriptUnavailable:
+            raise
+        except Exception as e:
+            raise TranscriptUnavailable(TRANSIENT) from e
+
+    @staticmethod
+    def _parse_json3(data):
+        events = data.get("events", [])
+        segments = []
+        for event in events:
+            segs = event.get("segs", [])
+            text = "".join(seg.get("utf8", "") for seg in segs).strip()
+            text = re.sub(r"\n", " ", text)
+            start_ms = event.get("tStartMs", 0)
+            if text and text != " ":
+                segments.append({"text": text, "start": start_ms / 1000.0})
+        return segments
 
     @staticmethod
     def _transcript_via_ytdlp(video_id, preferred_lang=None):
         try:
-            import yt_dlp
-            import tempfile
-            import glob
-            import os
-            import shutil
-
-            tmpdir = tempfile.mkdtemp()
-
-            sub_langs = []
-            if preferred_lang and preferred_lang != "auto":
-                sub_langs.append(preferred_lang)
-            sub_langs.append("en")
-
-            ydl_opts = {
-                "skip_download": True,
-                "writesubtitles": True,
-                "writeautomaticsub": True,
-                "subtitleslangs": sub_langs,
-                "subtitlesformat": "json3",
-                "outtmpl": os.path.join(tmpdir, "%(id)s"),
-                "quiet": True,
-                "no_warnings": True,
-            }
-
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([f"https://www.youtube.com/watch?v={video_id}"])
-
-                files = glob.glob(os.path.join(tmpdir, "*.json3"))
-                if files:
-                    with open(files[0], "r") as fp:
-                        data = json.load(fp)
-                    events = data.get("events", [])
-                    segments = []
-                    for event in events:
-                        segs = event.get("segs", [])
-                        text = "".join(seg.get("utf8", "") for seg in segs).strip()
-                        text = re.sub(r"\n", " ", text)
-                        start_ms = event.get("tStartMs", 0)
-                        if text and text != " ":
-                            segments.append({"text": text, "start": start_ms / 1000.0})
-                    return segments if segments else None
-            finally:
-                shutil.rmtree(tmpdir, ignore_errors=True)
-
-        except Exception:
-            return None
-
-    @staticmethod
-    def transcript(link, preferred_lang=None):
-        video_id = GetVideo.Id(link)
-        if not video_id:
+                info = VideoProbe.ytdlp_info(video_id)
+            except Exception as e:
+                raise TranscriptUnavailable(classify_error(e)) from e
+
+            tracks = []
+            for key, generated in (("subtitles", False), ("automatic_captions", True)):
+                for lang, formats in (info.get(key) or {}).items():
+                    for fmt in formats:
+                        if fmt.get("ext") == "json3" and fmt.get("url"):
+                            tracks.append({"lang": lang, "url": fmt["url"], "generated": generated})
+            if not tracks:
+                raise TranscriptUnavailable(NO_CAPTIONS)
+
+            # Automatic captions list every auto-translation too; only try the best few
+            ranked = GetVideo._rank_tracks(tracks, preferred_lang, lambda t: t["lang"], lambda t: t["generated"])
+            failed_status = None
+            for track in ranked[:3]:
+                # Straight into memory; no subtitle files on disk
+                started = time.perf_counter()
+                resp = HttpClient.get(track["url"], timeout=15)
+                VideoProbe.record_timing("subtitle_fetch", time.perf_counter() - started)
+                if resp.status_code != 200:
+                    failed_status = resp.status_code
+                    continue
+                segments = GetVideo._parse_json3(resp.json())
+                if segments:
+                    return segments, track["lang"]
+            if failed_status is not None:
+                raise TranscriptUnavailable(TRANSIENT, f"Subtitle download failed (HTTP {failed_status})")
             return None
 
-        segments = GetVideo._transcript_via_api(video_id, preferred_lang)
-
-        if not segments:
-            segments = GetVideo._transcript_via_page_scrape(video_id, preferred_lang)
+        except TranscriptUnavailable:
+            raise
+        except Exception as e:
+            raise TranscriptUnavailable(TRANSIENT) from e
 
-        if not segments:
-            segments = GetVideo._transcript_via_ytdlp(video_id, preferred_lang)
+    @staticmethod
+    def _fetch_segments(video_id, preferred_lang=None):
+        cached = TranscriptCache.get(video_id, preferred_lang)
+        if cached:
+            segments, language, source = cached
+            return TranscriptSegments(segments, video_id, language, source)
+
+        known_outcome = NegativeCache.get(video_id)
+        if known_outcome:
+            raise TranscriptUnavailable(known_outcome)
+
+        strategies = [
+            ("api", GetVideo._transcript_via_api),
+            ("page_scrape", GetVideo._transcript_via_page_scrape),
+            ("ytdlp", GetVideo._transcript_via_ytdlp),
+        ]
+        available = TRANSCRIPT_SCHEDULER.order([source for source, _ in strategies])
+        strategies = sorted(
+            [(source, strategy) for source, strategy in strategies if source in available],
+            key=lambda item: available.index(item[0]),
+        )
+        try:
+            winner = GetVideo._race_strategies(video_id, preferred_lang, strategies)
+        except TranscriptUnavailable as e:
+            NegativeCache.put(video_id, e.outcome)
+            raise
 
-        if segments:
-            # Group segments into paragraphs based on time gaps
-            paragraphs = []
-            current_para = []
-            prev_end = 0
+        if winner:
+            source, (segments, language) = winner
+            TranscriptCache.put(video_id, preferred_lang, segments, language, source)
+            NegativeCache.clear(video_id)
+            return TranscriptSegments(segments, video_id, language, source)
 
-            for s in segments:
-                start = float(s.get("start", 0))
-                text = s["text"].strip()
-                if not text:
-                    continue
+        return None
 
-                # If gap > 2 seconds, start a new paragraph
-                if current_para and (start - prev_end) > 2.0:
-                    paragraphs.append(" ".join(current_para))
-                    current_para = []
+    @staticmethod
+    def _timed_strategy(source, strategy, video_id, preferred_lang):
+        if not TRANSCRIPT_SCHEDULER.admit(source):
+            # Half-open and another request is already probing it
+            return None
+        # Recorded even when the race was already won, so late finishers still inform the ordering
+        started = time.monotonic()
+        healthy = False
+        try:
+            result = strategy(video_id, preferred_lang)
+            # Reached YouTube and got an answer, even if it held no usable captions
+            healthy = True
+            return result
+        except TranscriptUnavailable as e:
+            # A definitive "no" is still a working strategy; transport and HTTP errors are not
+            healthy = e.outcome != TRANSIENT
+            raise
+        finally:
+            TRANSCRIPT_SCHEDULER.record(source, healthy, time.monotonic() - started)
 
-                current_para.append(text)
-                # Estimate end time: start + rough duration per segment
-                prev_end = start + 3.0
+    @staticmethod
+    def strategy_stats():
+        return TRANSCRIPT_SCHEDULER.stats()
 
-            if current_para:
-                paragraphs.append(" ".join(current_para))
+    @staticmethod
+    def _race_strategies(video_id, preferred_lang, strategies, mode=None, hedge_delay=None,
+                         time_budget=None, max_concurrency=None):
+        mode = mode or TRANSCRIPT_FETCH_MODE
+        time_budget = TRANSCRIPT_TIME_BUDGET if time_budget is None else time_budget
+        max_concurrency = max(1, max_concurrency or TRANSCRIPT_MAX_CONCURRENCY)
+
+        if mode == "parallel":
+            hedge_delay = 0.0
+        elif mode == "sequential":
+            hedge_delay = float("inf")
+            max_concurrency = 1
+        elif hedge_delay is None:
+            hedge_delay = TRANSCRIPT_HEDGE_DELAY
+
+        queue = list(strategies)
+        pending = {}
+        outcomes = []
+        timed_out = False
+        deadline = time.monotonic() + time_budget
+        next_launch = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="transcript")
 
-            return "\n\n".join(paragraphs)
+        try:
+            while queue or pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    timed_out = True
+                    break
 
+                # Launch the next strategy when nothing is running or the hedge delay has passed
+                while queue and len(pending) < max_concurrency and (not pending or now >= next_launch):
+                    source, strategy = queue.pop(0)
+                    pending[executor.submit(GetVideo._timed_strategy, source, strategy, video_id, preferred_lang)] = source
+                    next_launch = now + hedge_delay
+
+                wake_at = deadline
+                if queue and len(pending) < max_concurrency:
+                    wake_at = min(deadline, next_launch)
+                done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+                # Prefer the earlier strategy when several finish in the same wake-up
+                for source, strategy in strategies:
+                    for future in [f for f in done if pending.get(f) == source]:
+                        del pending[future]
+                        try:
+                            result = future.result()
+                        except TranscriptUnavailable as e:
+                            # Private, age-restricted or removed: no other strategy will do better
+                            if e.is_hard_failure:
+                                raise
+                            outcomes.append(e.outcome)
+                            continue
+                        except Exception:
+                            result = None
+                        if result and result[0]:
+                            return source, result
+                        # No answer is not the same as "no captions"
+                        outcomes.append(TRANSIENT)
+        finally:
+            # Drop strategies that have not started; running ones finish in the background and are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Trust "no captions" only when every strategy finished and said so; anything else may work next time
+        if not timed_out and len(outcomes) == len(strategies) and all(o == NO_CAPTIONS for o in outcomes):
+            raise TranscriptUnavailable(NO_CAPTIONS)
         return None
 
     @staticmethod
-    def transcript_time(link, preferred_lang=None):
+    def segments(link, preferred_lang=None):
         video_id = GetVideo.Id(link)
         if not video_id:
             return None
 
-        segments = GetVideo._transcript_via_api(video_id, preferred_lang)
-
-        if not segments:
-            segments = GetVideo._transcript_via_page_scrape(video_id, preferred_lang)
+        # Sessions opening the same video at once run the fallback chain once
+        return SingleFlight.do(
+            request_key("segments", video_id, preferred_lang),
+            lambda: GetVideo._fetch_segments(video_id, preferred_lang),
+        )
 
-        if not segments:
-            segments = GetVideo._transcript_via_ytdlp(video_id, preferred_lang)
-
-        if segments:
-            final_transcript = ""
-            for s in segments:
-                timevar = round(float(s["start"]))
-                hours = int(timevar // 3600)
-                timevar %= 3600
-                minutes = int(timevar // 60)
-                timevar %= 60
-                timevex = f"{hours:02d}:{minutes:02d}:{timevar:02d}"
-                final_transcript += f'{s["text"]} "time:{timevex}" '
-            return final_transcript
+    @staticmethod
+    def transcript(link, preferred_lang=None):
+        try:
+            segments = GetVideo.segments(link, preferred_lang)
+        except TranscriptUnavailable:
+            return None
+        return segments.paragraphs() if segments else None
 
-        return None
\ No newline at end of file
+    @staticmethod
+    def transcript_time(link, preferred_lang=None):
+        try:
+            segments = GetVideo.segments(link, preferred_lang)
+        except TranscriptUnavailable:
+            return None
+        return segments.timed() if segments else None
@@ -0,0 +1,311 @@
+import os
+import copy
+import json
+import time
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
+from src.http_client import HttpClient
+from src.json_stream import extract_json_objects
+from src.negative_cache import (
+    TranscriptUnavailable, classify_playability, NO_CAPTIONS, TRANSIENT, COOKIE_FILES,
+)
+
+PROBE_TTL = float(os.getenv("VIDEO_PROBE_TTL", "1800"))
+# Idle YoutubeDL instances kept per option set
+YTDLP_POOL_SIZE = int(os.getenv("YTDLP_POOL_SIZE", "4"))
+
+WATCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+YTDLP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+_lock = threading.Lock()
+_page_cache = {}
+_ytdlp_cache = {}
+
+# Warm YoutubeDL instances by option set; building one loads every extractor and is not free.
+# Pooled rather than thread-local: strategy races and Streamlit scripts run on short-lived threads
+_ydl_pool = {}
+_timings = {}
+
+# (path, content) of this process's private copy of YOUTUBE_COOKIES
+_cookie_file = None
+
+
+def _cache_get(cache, key):
+    with _lock:
+        entry = cache.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        cache.pop(key, None)
+        return None
+
+
+def _cache_put(cache, key, value):
+    with _lock:
+        cache[key] = (time.time() + PROBE_TTL, value)
+
+
+def _record_timing(stage, seconds):
+    with _lock:
+        timing = _timings.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+
+
+class VideoProbe:
+    """
+    Collects everything we need to know about a video once and caches it:
+    title, duration, chapters, caption tracks and audio formats come from a
+    single streamed watch-page fetch; the yt-dlp info dict is extracted at most once
+    and shared by the subtitle strategy and the audio fallback.
+    """
+
+    @staticmethod
+    def get(video_id):
+        if not video_id:
+            return None
+
+        probe = _cache_get(_page_cache, video_id)
+        if probe is None:
+            probe = VideoProbe._probe_watch_page(video_id)
+            if probe is None:
+                return None
+            _cache_put(_page_cache, video_id, probe)
+
+        if not probe["chapters"]:
+            # yt-dlp knows chapters from the description too; use them if we already paid for the extraction
+            info = _cache_get(_ytdlp_cache, video_id)
+            if info and info.get("chapters"):
+                probe["chapters"] = [
+                    {"start": float(c.get("start_time", 0)), "title": c.get("title", "")}
+                    for c in info["chapters"]
+                ]
+        # Callers mutate what they get back; the cached dict must stay intact
+        return copy.deepcopy(probe)
+
+    @staticmethod
+    def invalidate(video_id):
+        with _lock:
+            _page_cache.pop(video_id, None)
+            _ytdlp_cache.pop(video_id, None)
+
+    @staticmethod
+    def _parse_chapters(initial_data):
+        chapters = []
+        seen = set()
+        stack = [initial_data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                chapter = node.get("chapterRenderer")
+                if isinstance(chapter, dict) and "timeRangeStartMillis" in chapter:
+                    start_ms = chapter["timeRangeStartMillis"]
+                    if start_ms not in seen:
+                        seen.add(start_ms)
+                        chapters.append({
+                            "start": int(start_ms) / 1000.0,
+                            "title": chapter.get("title", {}).get("simpleText", ""),
+                        })
+                    continue
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return sorted(chapters, key=lambda c: c["start"])
+
+    @staticmethod
+    def _build_probe(video_id, player, initial_data=None):
+        player = player or {}
+        details = player.get("videoDetails", {})
+        captions = player.get("captions", {})
+        renderer = captions.get("playerCaptionsTracklistRenderer", {})
+        streaming = player.get("streamingData", {})
+
+        audio_formats = []
+        for fmt in streaming.get("adaptiveFormats", []):
+            if not fmt.get("mimeType", "").startswith("audio/"):
+                continue
+            audio_formats.append({
+                "itag": fmt.get("itag"),
+                "mime_type": fmt.get("mimeType"),
+                "bitrate": fmt.get("averageBitrate") or fmt.get("bitrate"),
+                "content_length": int(fmt["contentLength"]) if fmt.get("contentLength") else None,
+                "audio_quality": fmt.get("audioQuality"),
+            })
+
+        return {
+            "video_id": video_id,
+            "title": details.get("title"),
+            "duration": float(details["lengthSeconds"]) if details.get("lengthSeconds") else None,
+            "chapters": VideoProbe._parse_chapters(initial_data) if initial_data else [],
+            "caption_tracks": renderer.get("captionTracks", []),
+            "audio_formats": audio_formats,
+            "playability": player.get("playabilityStatus", {}).get("status"),
+            "playability_reason": player.get("playabilityStatus", {}).get("reason", ""),
+        }
+
+    @staticmethod
+    def _stream_watch_page(video_id, markers):
+        resp = HttpClient.get(f"https://www.youtube.com/watch?v={video_id}", headers=WATCH_HEADERS, timeout=15, stream=True)
+        if resp.status_code != 200:
+            resp.close()
+            return None
+        # Stops downloading once every requested object is complete
+        results, _ = extract_json_objects(resp, markers)
+        return results
+
+    @staticmethod
+    def _probe_watch_page(video_id):
+        try:
+            results = VideoProbe._stream_watch_page(video_id, ["ytInitialPlayerResponse", "ytInitialData"])
+            if results is None:
+                return None
+            return VideoProbe._build_probe(video_id, results.get("ytInitialPlayerResponse"), results.get("ytInitialData"))
+        except Exception as e:
+            print(f"Video probe failed for {video_id}: {str(e)}")
+            return None
+
+    @staticmethod
+    def caption_tracks(video_id):
+        """
+        Caption tracks from the player response. Raises TranscriptUnavailable when
+        the page says the video is private, removed, age-restricted or uncaptioned.
+        """
+        probe = _cache_get(_page_cache, video_id)
+        if probe is None:
+            # Only the player response is needed, which sits well before the bulk of the page
+            results = VideoProbe._stream_watch_page(video_id, ["ytInitialPlayerResponse"])
+            if not results or not results.get("ytInitialPlayerResponse"):
+                return None
+            probe = VideoProbe._build_probe(video_id, results["ytInitialPlayerResponse"])
+
+        outcome = classify_playability(probe["playability"], probe["playability_reason"])
+        if outcome == TRANSIENT:
+            return None
+        if outcome:
+            raise TranscriptUnavailable(outcome)
+        if probe["playability"] and not probe["caption_tracks"]:
+            raise TranscriptUnavailable(NO_CAPTIONS)
+        return copy.deepcopy(probe["caption_tracks"])
+
+    @staticmethod
+    def cookie_path():
+        # Check for YouTube cookies in env var (Netscape format content)
+        cookies_content = os.getenv("YOUTUBE_COOKIES")
+        if cookies_content:
+            return VideoProbe._cookie_file(cookies_content)
+        for path in COOKIE_FILES:
+            # cookies.txt next to the app, then the common Render secret path
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def _cookie_file(content):
+        """
+        Write the cookie secret to a private temp file once per process and reuse
+        it for every yt-dlp call; it is removed when the process exits.
+        """
+        global _cookie_file
+        with _lock:
+            if _cookie_file is not None and _cookie_file[1] == content and os.path.exists(_cookie_file[0]):
+                return _cookie_file[0]
+
+            fd, path = tempfile.mkstemp(prefix="yt_cookies_", suffix=".txt")
+            with os.fdopen(fd, "w") as fp:
+                fp.write(content)
+            if _cookie_file is None:
+                atexit.register(VideoProbe._remove_cookie_file)
+            else:
+                # The secret changed; drop the old copy
+                VideoProbe._unlink(_cookie_file[0])
+            _cookie_file = (path, content)
+            return path
+
+    @staticmethod
+    def _remove_cookie_file():
+        if _cookie_file is not None:
+            VideoProbe._unlink(_cookie_file[0])
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def ytdlp_opts(**extra):
+        opts = {
+            "quiet": True,
+            "no_warnings": True,
+        }
+
+        # If we have cookies, use them with the standard 'web' client.
+        # No cookies = try Android client to bypass bot check
+        cookie_path = VideoProbe.cookie_path()
+        if cookie_path:
+            opts["cookiefile"] = cookie_path
+            opts["user_agent"] = YTDLP_USER_AGENT
+            opts["extractor_args"] = {"youtube": {"player_client": ["web"]}}
+        else:
+            opts["extractor_args"] = {"youtube": {"player_client": ["android", "ios"]}}
+
+        opts.update(extra)
+        return opts
+
+    @staticmethod
+    @contextmanager
+    def _ytdlp():
+        """Borrow a warm YoutubeDL for the current options; one caller uses an instance at a time."""
+        opts = VideoProbe.ytdlp_opts()
+        key = json.dumps(opts, sort_keys=True, default=str)
+        with _lock:
+            idle = _ydl_pool.get(key)
+            ydl = idle.pop() if idle else None
+        if ydl is None:
+            import yt_dlp
+
+            started = time.perf_counter()
+            ydl = yt_dlp.YoutubeDL(opts)
+            _record_timing("ytdlp_setup", time.perf_counter() - started)
+
+        yield ydl
+
+        # Only reached when the call succeeded; an instance that raised is not reused
+        with _lock:
+            idle = _ydl_pool.setdefault(key, [])
+            if len(idle) < YTDLP_POOL_SIZE:
+                idle.append(ydl)
+
+    @staticmethod
+    def ytdlp_info(video_id):
+        """Return a private copy of the cached yt-dlp info dict for ``video_id``."""
+        info = _cache_get(_ytdlp_cache, video_id)
+        if info is None:
+            with VideoProbe._ytdlp() as ydl:
+                started = time.perf_counter()
+                info = ydl.sanitize_info(ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False))
+                _record_timing("ytdlp_extract", time.perf_counter() - started)
+            _cache_put(_ytdlp_cache, video_id, info)
+        # Callers (and yt-dlp's own processing) mutate the dict
+        return copy.deepcopy(info)
+
+    @staticmethod
+    def record_timing(stage, seconds):
+        _record_timing(stage, seconds)
+
+    @staticmethod
+    def timings():
+        """Setup vs network time spent in yt-dlp, per stage: count, total, mean and max seconds."""
+        with _lock:
+            return {
+                stage: dict(t, mean=t["total"] / t["count"] if t["count"] else 0.0)
+                for stage, t in _timings.items()
+            }
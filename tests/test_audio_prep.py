@@ -0,0 +1,27 @@
+import pytest
+
+from src import audio_prep
+from src.audio_prep import segment_windows
+
+
+@pytest.fixture(autouse=True)
+def windows(monkeypatch):
+    monkeypatch.setattr(audio_prep, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(audio_prep, "AUDIO_SEGMENT_SECONDS", 1200.0)
+    monkeypatch.setattr(audio_prep, "AUDIO_SEGMENT_OVERLAP", 10.0)
+    monkeypatch.setattr(audio_prep, "AUDIO_SEGMENT_MIN_DURATION", 2400.0)
+
+
+def test_short_audio_is_sent_whole():
+    assert segment_windows(None) is None
+    assert segment_windows(2399) is None
+
+
+def test_windows_overlap_and_cover_the_whole_duration():
+    assert segment_windows(3000) == [(0.0, 1200.0), (1190.0, 1210.0), (2390.0, 610.0)]
+
+
+def test_no_windows_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_prep, "ffmpeg_available", lambda: False)
+
+    assert segment_windows(10000) is None
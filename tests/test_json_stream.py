@@ -0,0 +1,55 @@
+import json
+
+from src.json_stream import JsonStreamExtractor
+
+
+def _page(*objects):
+    body = "".join(f"<script>var {name} = {json.dumps(value)};</script>" for name, value in objects)
+    return f"<html><body>{body}<p>footer</p></body></html>".encode("utf-8")
+
+
+def _feed(extractor, data, size):
+    for i in range(0, len(data), size):
+        if extractor.feed(data[i:i + size]):
+            break
+
+
+def test_extracts_every_marker_across_chunk_boundaries():
+    player = {"videoDetails": {"title": "Brace } and quote \" inside", "lengthSeconds": "61"}}
+    initial = {"contents": [{"emoji": "🎬", "path": "a\\\\b"}]}
+    data = _page(("ytInitialPlayerResponse", player), ("ytInitialData", initial))
+
+    for size in (1, 7, 64, len(data)):
+        extractor = JsonStreamExtractor(["ytInitialPlayerResponse", "ytInitialData"])
+        _feed(extractor, data, size)
+        assert extractor.done
+        assert extractor.results == {"ytInitialPlayerResponse": player, "ytInitialData": initial}
+
+
+def test_stops_reading_once_everything_is_found():
+    data = _page(("ytInitialPlayerResponse", {"a": 1})) + b"x" * 100000
+    extractor = JsonStreamExtractor(["ytInitialPlayerResponse"])
+
+    _feed(extractor, data, 1024)
+
+    assert extractor.results == {"ytInitialPlayerResponse": {"a": 1}}
+    assert extractor.bytes_read < 2048
+
+
+def test_missing_marker_stays_pending():
+    extractor = JsonStreamExtractor(["ytInitialPlayerResponse", "ytInitialData"])
+
+    _feed(extractor, _page(("ytInitialData", {"b": 2})), 16)
+
+    assert not extractor.done
+    assert extractor.pending == ["ytInitialPlayerResponse"]
+    assert extractor.results == {"ytInitialData": {"b": 2}}
+
+
+def test_invalid_object_is_recorded_as_none():
+    extractor = JsonStreamExtractor(["ytInitialData"])
+
+    extractor.feed(b"var ytInitialData = {not json};")
+
+    assert extractor.done
+    assert extractor.results == {"ytInitialData": None}
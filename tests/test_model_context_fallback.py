@@ -0,0 +1,86 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.context_cache import ContextCache
+from src.model import Model
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Plays generateContent: answers requests that reference a cachedContent with ``cached_reply``."""
+
+    cached_reply = (200, {})
+    bodies = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        _StandIn.bodies.append(body)
+        status, payload = _StandIn.cached_reply if "cachedContent" in body else (200, {"answer": "inline"})
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    _StandIn.bodies = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    invalidated = []
+    monkeypatch.setattr(ContextCache, "handle", lambda *args, **kwargs: "cachedContents/abc")
+    monkeypatch.setattr(ContextCache, "invalidate", invalidated.append)
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/generate", invalidated
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _post(url):
+    return Model._post(url, {"Content-Type": "application/json"}, "Summarize", "transcript", "key", timeout=5)
+
+
+def test_expired_cache_is_resent_inline(server):
+    url, invalidated = server
+    _StandIn.cached_reply = (404, {"error": {"code": 404, "status": "NOT_FOUND", "message": "CachedContent not found"}})
+
+    response = _post(url)
+
+    assert response.status_code == 200
+    assert response.json() == {"answer": "inline"}
+    assert invalidated == ["cachedContents/abc"]
+    assert [("cachedContent" in body) for body in _StandIn.bodies] == [True, False]
+    assert "transcript" in json.dumps(_StandIn.bodies[1])
+
+
+def test_cache_permission_error_naming_cached_content_is_resent_inline(server):
+    url, invalidated = server
+    _StandIn.cached_reply = (
+        403,
+        {"error": {"code": 403, "status": "PERMISSION_DENIED", "message": "No access to cachedContents/abc"}},
+    )
+
+    assert _post(url).status_code == 200
+    assert invalidated == ["cachedContents/abc"]
+
+
+@pytest.mark.parametrize("status, error", [
+    (400, {"code": 400, "status": "INVALID_ARGUMENT", "message": "Invalid JSON payload"}),
+    (403, {"code": 403, "status": "PERMISSION_DENIED", "message": "API key not valid"}),
+])
+def test_other_client_errors_reach_the_caller(server, status, error):
+    url, invalidated = server
+    _StandIn.cached_reply = (status, {"error": error})
+
+    response = _post(url)
+
+    assert response.status_code == status
+    assert response.json()["error"]["message"] == error["message"]
+    assert invalidated == []
+    assert len(_StandIn.bodies) == 1
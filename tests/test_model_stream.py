@@ -0,0 +1,56 @@
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src import model
+from src.model import Model
+from src.response_cache import ResponseCache
+
+DELTAS = ["Namaste: ", "नमस्ते ", "दुनिया"]
+
+
+class _SSEStandIn(BaseHTTPRequestHandler):
+    """Plays streamGenerateContent?alt=sse, with no charset and a character split across writes."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        body = b"".join(
+            b"data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": delta}]}}]},
+                                   ensure_ascii=False).encode("utf-8") + b"\r\n\r\n"
+            for delta in DELTAS
+        )
+        split = body.index("न".encode("utf-8")) + 1
+        for piece in (body[:split], body[split:]):
+            self.wfile.write(piece)
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _SSEStandIn)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setattr(model, "GEMINI_API_BASE", f"http://127.0.0.1:{httpd.server_address[1]}")
+    monkeypatch.setenv("GOOGLE_GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("GEMINI_CACHE_BACKEND", "memory")
+    yield
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_stream_yields_utf8_deltas_and_caches_the_whole_text(server):
+    prompt = f"Summarize {uuid.uuid4().hex}"
+
+    deltas = list(Model._generate_stream(prompt))
+
+    assert deltas == DELTAS
+    cache_key = Model._cache_key(Model._request_body(Model._inline_prompt(prompt)))
+    assert ResponseCache.get(cache_key) == "".join(DELTAS)
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from src.transcript_cache import TranscriptCache
+from src.negative_cache import NegativeCache, AGE_RESTRICTED, NO_CAPTIONS, PRIVATE, TRANSIENT
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Cookie files are looked up relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("YOUTUBE_COOKIES", raising=False)
+    monkeypatch.setenv("TRANSCRIPT_CACHE_DIR", str(tmp_path / "transcripts"))
+    monkeypatch.delenv("TRANSCRIPT_CACHE_ENABLED", raising=False)
+    return tmp_path / "transcripts"
+
+
+SEGMENTS = [{"text": "hello", "start": 0.0}]
+
+
+def test_negative_cache_remembers_final_outcomes(monkeypatch):
+    NegativeCache.put("vid", PRIVATE)
+    assert NegativeCache.get("vid") == PRIVATE
+
+    NegativeCache.clear("vid")
+    assert NegativeCache.get("vid") is None
+
+    NegativeCache.put("vid", NO_CAPTIONS)
+    monkeypatch.setenv("NEGATIVE_CACHE_TTL", "0")
+    time.sleep(0.01)
+    assert NegativeCache.get("vid") is None
+
+
+def test_negative_cache_skips_transient_failures():
+    NegativeCache.put("vid", TRANSIENT)
+
+    assert NegativeCache.get("vid") is None
+
+
+def test_age_restriction_is_not_final_with_cookies(monkeypatch):
+    NegativeCache.put("vid", AGE_RESTRICTED)
+    assert NegativeCache.get("vid") == AGE_RESTRICTED
+
+    monkeypatch.setenv("YOUTUBE_COOKIES", "# Netscape HTTP Cookie File")
+    NegativeCache.put("other", AGE_RESTRICTED)
+    assert NegativeCache.get("other") is None
+
+
+def test_invalidate_removes_the_video_and_its_negative_entry():
+    TranscriptCache.put("vid", None, SEGMENTS, "en", "api")
+    TranscriptCache.put("keep", None, SEGMENTS, "en", "api")
+    NegativeCache.put("vid", NO_CAPTIONS)
+
+    TranscriptCache.invalidate("vid")
+
+    assert TranscriptCache.get("vid") is None
+    assert NegativeCache.get("vid") is None
+    assert TranscriptCache.get("keep") is not None
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from src.prefetch import PrefetchExecutor, Cancelled
+from src.response_cache import MemoryBackend
+
+
+@pytest.fixture
+def executor():
+    executor = PrefetchExecutor(workers=2)
+    yield executor
+    executor._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_result_is_stored_when_the_job_finishes(executor):
+    store = MemoryBackend(16)
+
+    job = executor.submit("s1", "key", lambda job, value: value * 2, 21, store=store)
+
+    assert job.wait(2) == 42
+    assert _until(lambda: store.get("key", 60) == 42)
+    assert executor.stats()["completed"] == 1
+
+
+def test_second_session_attaches_to_the_running_job(executor):
+    release = threading.Event()
+    calls = []
+
+    def work(job):
+        calls.append(1)
+        release.wait(2)
+        return "done"
+
+    first = executor.submit("s1", "key", work)
+    second = executor.submit("s2", "key", work)
+    release.set()
+
+    assert first is second
+    assert second.wait(2) == "done"
+    assert len(calls) == 1
+    assert executor.stats()["attached"] == 1
+
+
+def test_released_job_stops_and_stores_nothing(executor):
+    store = MemoryBackend(16)
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            job.check()
+            time.sleep(0.01)
+
+    job = executor.submit("s1", "key", work, store=store)
+    started.wait(2)
+    executor.release("s1")
+
+    assert job.wait(2) is None
+    assert _until(lambda: executor.stats()["cancelled"] == 1)
+    assert store.get("key", 60) is None
+
+
+def test_job_finishing_after_release_does_not_store(executor):
+    store = MemoryBackend(16)
+    started = threading.Event()
+    release = threading.Event()
+
+    def work(job):
+        started.set()
+        release.wait(2)
+        return "stale"
+
+    job = executor.submit("s1", "key", work, store=store)
+    started.wait(2)
+    executor.release("s1")
+    release.set()
+
+    assert _until(job.done)
+    assert _until(lambda: executor.stats()["cancelled"] == 1)
+    assert store.get("key", 60) is None
+
+
+def test_release_keeps_jobs_other_sessions_hold(executor):
+    release = threading.Event()
+    job = executor.submit("s1", "key", lambda job: release.wait(2) and "kept")
+    executor.submit("s2", "key", lambda job: None)
+
+    executor.release("s1")
+    release.set()
+
+    assert not job.cancelled()
+    assert job.wait(2) == "kept"
+
+
+def test_release_keep_spares_the_listed_keys(executor):
+    release = threading.Event()
+    kept = executor.submit("s1", "a", lambda job: release.wait(2) and "a")
+    dropped = executor.submit("s1", "b", lambda job: release.wait(2) and "b")
+
+    executor.release("s1", keep={"a"})
+    release.set()
+
+    assert kept.wait(2) == "a"
+    assert dropped.cancelled()
+
+
+def test_check_raises_once_cancelled():
+    from src.prefetch import Job
+
+    job = Job("key")
+    job._cancelled.set()
+
+    with pytest.raises(Cancelled):
+        job.check()
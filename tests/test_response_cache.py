@@ -0,0 +1,32 @@
+import pytest
+
+from src.response_cache import ResponseCache, request_key
+
+
+@pytest.fixture(autouse=True)
+def memory_backend(monkeypatch):
+    monkeypatch.setenv("GEMINI_CACHE_BACKEND", "memory")
+    monkeypatch.delenv("GEMINI_CACHE_BYPASS", raising=False)
+    ResponseCache.clear()
+
+
+def test_regenerated_answer_replaces_the_cached_one():
+    key = request_key("generateContent", "model", "prompt")
+    ResponseCache.put(key, "old answer")
+
+    # Regenerate: the lookup is skipped, the fresh answer is still written
+    assert ResponseCache.get(key, use_cache=False) is None
+    ResponseCache.put(key, "new answer")
+
+    assert ResponseCache.get(key) == "new answer"
+
+
+def test_error_strings_and_bypass_are_never_stored(monkeypatch):
+    key = request_key("generateContent", "model", "failing prompt")
+    ResponseCache.put(key, "⚠️ API error")
+    assert ResponseCache.get(key) is None
+
+    monkeypatch.setenv("GEMINI_CACHE_BYPASS", "1")
+    ResponseCache.put(key, "answer")
+    monkeypatch.delenv("GEMINI_CACHE_BYPASS")
+    assert ResponseCache.get(key) is None
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from src import single_flight
+from src.single_flight import SingleFlight
+
+
+def _together(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results, errors = _together(5, lambda: SingleFlight.do("coalesce", work))
+
+    assert results == ["answer"] * 5
+    assert errors == [None] * 5
+    assert len(calls) == 1
+
+
+def test_each_waiter_raises_its_own_copy_of_the_error():
+    class Boom(Exception):
+        pass
+
+    def work():
+        time.sleep(0.2)
+        raise Boom("failed")
+
+    _, errors = _together(4, lambda: SingleFlight.do("error", work))
+
+    assert all(isinstance(e, Boom) and str(e) == "failed" for e in errors)
+    assert len({id(e) for e in errors}) == 4
+
+
+def test_sequential_calls_are_not_coalesced():
+    calls = []
+    for _ in range(2):
+        SingleFlight.do("sequential", lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+
+def test_stream_waiters_get_the_whole_text():
+    started = threading.Event()
+
+    def deltas():
+        started.set()
+        for piece in ("a", "b", "c"):
+            time.sleep(0.05)
+            yield piece
+
+    leader = []
+    thread = threading.Thread(target=lambda: leader.extend(SingleFlight.stream("stream", deltas)))
+    thread.start()
+    started.wait()
+    follower = list(SingleFlight.stream("stream", lambda: iter(["never"])))
+    thread.join()
+
+    assert leader == ["a", "b", "c"]
+    assert follower == ["abc"]
+
+
+@pytest.mark.parametrize("mode", ["file", "sqlite"])
+def test_cross_process_lock_modes(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_MODE", mode)
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_DIR", str(tmp_path))
+
+    assert SingleFlight.do(f"locked-{mode}", lambda: 42) == 42
+    assert SingleFlight.stats()["mode"] == mode
@@ -0,0 +1,77 @@
+import time
+
+from src.strategy_scheduler import StrategyScheduler
+
+
+def test_orders_by_expected_time_to_success():
+    scheduler = StrategyScheduler("test")
+    for i in range(5):
+        scheduler.record("slow", True, 2.0)
+        scheduler.record("fast", True, 0.2)
+        # Quicker than "slow" on average, but fails often enough to cost more
+        scheduler.record("flaky", i % 2 == 0, 1.5)
+
+    assert scheduler.order(["slow", "flaky", "fast"]) == ["fast", "slow", "flaky"]
+
+
+def test_untimed_strategies_keep_their_given_order():
+    assert StrategyScheduler("test").order(["a", "b", "c"]) == ["a", "b", "c"]
+
+
+def test_breaker_opens_after_consecutive_failures():
+    scheduler = StrategyScheduler("test", failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        scheduler.record("a", False, 0.1)
+    assert "a" in scheduler.order(["a", "b"])
+
+    scheduler.record("a", False, 0.1)
+
+    assert scheduler.order(["a", "b"]) == ["b"]
+    assert scheduler.stats()["a"]["state"] == "open"
+
+
+def test_half_open_admits_a_single_probe():
+    scheduler = StrategyScheduler("test", failure_threshold=1, cooldown=0.2)
+    scheduler.record("a", False, 0.1)
+    assert scheduler.order(["a", "b"]) == ["b"]
+
+    time.sleep(0.25)
+
+    assert "a" in scheduler.order(["a", "b"])
+    assert scheduler.admit("a")
+    assert scheduler.order(["a", "b"]) == ["b"]
+    assert not scheduler.admit("a")
+
+    scheduler.record("a", False, 0.1)
+    assert scheduler.order(["a", "b"]) == ["b"]
+    assert scheduler.stats()["a"]["state"] == "open"
+
+
+def test_unlaunched_probe_keeps_the_breaker_half_open():
+    scheduler = StrategyScheduler("test", failure_threshold=1, cooldown=0.2)
+    scheduler.record("a", False, 0.1)
+    time.sleep(0.25)
+
+    # Ranked, but the race was won before "a" started
+    assert "a" in scheduler.order(["a", "b"])
+
+    assert "a" in scheduler.order(["a", "b"])
+    assert scheduler.stats()["a"]["state"] == "half_open"
+
+
+def test_success_closes_the_breaker():
+    scheduler = StrategyScheduler("test", failure_threshold=1, cooldown=60)
+    scheduler.record("a", False, 0.1)
+
+    scheduler.record("a", True, 0.1)
+
+    assert "a" in scheduler.order(["a", "b"])
+    assert scheduler.stats()["a"]["state"] == "closed"
+
+
+def test_all_open_still_probes_the_first_to_recover():
+    scheduler = StrategyScheduler("test", failure_threshold=1, cooldown=60)
+    scheduler.record("a", False, 0.1)
+    scheduler.record("b", False, 0.1)
+
+    assert scheduler.order(["a", "b"]) == ["a"]
@@ -0,0 +1,32 @@
+from src.timestamp_formatter import TimestampFormatter
+
+
+def test_shift_moves_leading_timestamps():
+    text = "00:30 - Intro\n1:05:00 - Wrap-up"
+
+    assert TimestampFormatter.shift(text, 600) == "00:10:30 - Intro\n01:15:00 - Wrap-up"
+
+
+def test_shift_leaves_times_in_descriptions_alone():
+    text = "00:30 - The meeting at 10:30 ran until 11:45:00"
+
+    assert TimestampFormatter.shift(text, 60) == "00:01:30 - The meeting at 10:30 ran until 11:45:00"
+
+
+def test_shift_handles_markers_brackets_and_ranges():
+    text = "- **02:10** Setup\n[02:10] - [03:00] Range\n3. 04:00 Item"
+
+    assert TimestampFormatter.shift(text, 5) == (
+        "- **00:02:15** Setup\n[00:02:15] - [00:03:05] Range\n3. 00:04:05 Item"
+    )
+
+
+def test_shift_without_offset_returns_text_unchanged():
+    assert TimestampFormatter.shift("00:30 - Intro", 0) == "00:30 - Intro"
+    assert TimestampFormatter.shift("", 30) == ""
+
+
+def test_shifted_output_formats_like_any_other():
+    shifted = TimestampFormatter.shift("00:30 Intro", 1200)
+
+    assert TimestampFormatter.format(shifted) == "00:20:30 - Intro"
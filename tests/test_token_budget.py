@@ -0,0 +1,85 @@
+import logging
+
+import pytest
+
+from src import token_budget
+from src.token_budget import TokenBudget, compact_text, script_mix, FULL, COMPACTED, MAP_REDUCE
+
+
+@pytest.fixture(autouse=True)
+def fresh_calibration(monkeypatch):
+    monkeypatch.setattr(TokenBudget, "_factors", {})
+    monkeypatch.setattr(TokenBudget, "_since_calibration", 0)
+    monkeypatch.setattr(TokenBudget, "_calibrating", False)
+
+
+def test_script_mix_and_estimates_depend_on_script():
+    assert script_mix("hello") == {"latin": 1.0}
+    assert max(script_mix("这是一个测试"), key=script_mix("这是一个测试").get) == "cjk"
+    assert TokenBudget.estimate("a" * 400) == 100
+    assert TokenBudget.estimate("字" * 120) == 100
+
+
+def test_record_count_corrects_the_estimate():
+    sample = "word " * 100
+    TokenBudget.record_count(sample, 250)
+
+    assert TokenBudget.estimate(sample) == 250
+
+
+def test_calibration_sample_is_handed_out_once_at_a_time():
+    text = "word " * 100
+    assert TokenBudget.calibration_sample(text)
+    assert TokenBudget.calibration_sample(text) is None
+
+    TokenBudget.calibration_failed()
+    assert TokenBudget.calibration_sample(text)
+
+
+def test_compact_text_strips_cues_and_thins_markers():
+    text = 'um, we start [Music] "time:00:00:01" here "time:00:00:05" now "time:00:00:40" later'
+
+    compacted = compact_text(text, language="en")
+
+    assert compacted == 'we start "time:00:00:01" here now "time:00:00:40" later'
+
+
+def test_compact_text_keeps_fillers_outside_english():
+    assert compact_text("é um livro [Music]", language="pt") == "é um livro"
+    assert compact_text("um livro", language=None) == "um livro"
+
+
+def test_plan_picks_full_compacted_or_map_reduce(monkeypatch):
+    monkeypatch.setattr(token_budget, "GEMINI_INPUT_TOKEN_BUDGET", 1000)
+    monkeypatch.setattr(token_budget, "GEMINI_MAP_CHUNK_TOKENS", 500)
+
+    assert TokenBudget.plan("a" * 2000, "gemini-2.5-flash")["strategy"] == FULL
+
+    noisy = "word [Music] " * 400
+    plan = TokenBudget.plan(noisy, "gemini-2.5-flash", language="en")
+    assert plan["strategy"] == COMPACTED
+    assert "[Music]" not in plan["text"]
+
+    plan = TokenBudget.plan("a" * 20000, "gemini-2.5-flash")
+    assert plan["strategy"] == MAP_REDUCE
+    assert plan["text"] is None
+    assert plan["chunk_chars"] == 2000
+
+
+def test_overhead_and_output_reserve_shrink_the_budget():
+    window = token_budget.CONTEXT_WINDOWS["gemini-2.5-flash"]
+    assert TokenBudget.input_budget("gemini-2.5-flash") == min(token_budget.GEMINI_INPUT_TOKEN_BUDGET, window)
+    assert TokenBudget.input_budget("unknown-model", 8192) == token_budget.DEFAULT_CONTEXT_WINDOW - 8192
+
+
+def test_every_plan_is_logged(monkeypatch, caplog):
+    monkeypatch.setattr(token_budget, "GEMINI_INPUT_TOKEN_BUDGET", 1000)
+    caplog.set_level(logging.DEBUG, logger="src.token_budget")
+
+    TokenBudget.plan("a" * 2000, "gemini-2.5-flash")
+    TokenBudget.plan("a" * 20000, "gemini-2.5-flash")
+
+    assert [(r.levelno, "strategy=" + r.args[5]) for r in caplog.records] == [
+        (logging.DEBUG, "strategy=full"),
+        (logging.INFO, "strategy=map_reduce"),
+    ]
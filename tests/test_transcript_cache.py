@@ -0,0 +1,53 @@
+import os
+import time
+
+import pytest
+
+from src.transcript_cache import TranscriptCache
+
+SEGMENTS = [{"text": "hello", "start": 0.0}, {"text": "world", "start": 2.5}]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Cookie files are looked up relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("YOUTUBE_COOKIES", raising=False)
+    monkeypatch.setenv("TRANSCRIPT_CACHE_DIR", str(tmp_path / "transcripts"))
+    monkeypatch.delenv("TRANSCRIPT_CACHE_ENABLED", raising=False)
+    return tmp_path / "transcripts"
+
+
+def test_round_trip_per_requested_language():
+    TranscriptCache.put("vid", "en", SEGMENTS, "en", "api")
+
+    assert TranscriptCache.get("vid", "en") == (SEGMENTS, "en", "api")
+    assert TranscriptCache.get("vid", "de") is None
+    assert TranscriptCache.get("other", "en") is None
+
+
+def test_disabled_cache_neither_reads_nor_writes(monkeypatch):
+    monkeypatch.setenv("TRANSCRIPT_CACHE_ENABLED", "0")
+    TranscriptCache.put("vid", None, SEGMENTS, "en", "api")
+
+    assert TranscriptCache.get("vid") is None
+
+
+def test_expired_entry_is_dropped(monkeypatch, cache_dir):
+    TranscriptCache.put("vid", None, SEGMENTS, "en", "api")
+    monkeypatch.setenv("TRANSCRIPT_CACHE_TTL", "0")
+    time.sleep(0.01)
+
+    assert TranscriptCache.get("vid") is None
+    assert os.listdir(cache_dir) == []
+
+
+def test_eviction_keeps_the_cache_under_its_size_limit(monkeypatch, cache_dir):
+    monkeypatch.setenv("TRANSCRIPT_CACHE_MAX_MB", "0.002")
+    big = [{"text": "x" * 500, "start": float(i)} for i in range(3)]
+    for i in range(5):
+        TranscriptCache.put(f"vid{i}", None, big, "en", "api")
+
+    total = sum(os.path.getsize(cache_dir / name) for name in os.listdir(cache_dir))
+    assert total <= 0.002 * 1024 * 1024
+    assert TranscriptCache.get("vid4") is not None